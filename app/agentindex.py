@@ -0,0 +1,145 @@
+import bisect
+import itertools
+import re
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from swarm import Agent
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text.lower()))
+
+
+class AgentIndex:
+    """
+    In-memory name, category and word indexes over agents
+
+    Lookups by name are O(1), category listings keep insertion order and
+    can be paged, and search matches query words as prefixes of the words
+    in agent names and instructions.
+    """
+
+    def __init__(self):
+        self._agents: Dict[str, Tuple[str, Agent]] = {}
+        self._categories: Dict[str, Dict[str, Agent]] = {}
+        self._words: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._lock = threading.RLock()
+
+    def _index_words(self, agent: Agent) -> Set[str]:
+        text = agent.instructions if isinstance(agent.instructions, str) else ""
+        return _words(agent.name) | _words(text)
+
+    def add(self, agent: Agent, category: str) -> None:
+        """Add or replace an agent; a name lives in one category only"""
+        with self._lock:
+            self.remove(agent.name)
+            self._agents[agent.name] = (category, agent)
+            self._categories.setdefault(category, {})[agent.name] = agent
+            words = self._words[agent.name] = self._index_words(agent)
+            for word in words:
+                names = self._postings.get(word)
+                if names is None:
+                    names = self._postings[word] = set()
+                    bisect.insort(self._vocabulary, word)
+                names.add(agent.name)
+
+    def remove(self, name: str) -> Optional[Agent]:
+        with self._lock:
+            entry = self._agents.pop(name, None)
+            if entry is None:
+                return None
+            category, agent = entry
+            del self._categories[category][name]
+            for word in self._words.pop(name):
+                names = self._postings[word]
+                names.discard(name)
+                if not names:
+                    del self._postings[word]
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            return agent
+
+    def get(self, name: str) -> Optional[Agent]:
+        entry = self._agents.get(name)
+        return entry[1] if entry else None
+
+    def category_of(self, name: str) -> Optional[str]:
+        entry = self._agents.get(name)
+        return entry[0] if entry else None
+
+    def names(self, category: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if category is None:
+                return list(self._agents)
+            return list(self._categories.get(category, {}))
+
+    def entries(self) -> List[Tuple[str, str, Agent]]:
+        """(name, category, agent) for every agent"""
+        with self._lock:
+            return [
+                (name, category, agent)
+                for name, (category, agent) in self._agents.items()
+            ]
+
+    def count(self, category: Optional[str] = None) -> int:
+        if category is None:
+            return len(self._agents)
+        return len(self._categories.get(category, {}))
+
+    def page(
+        self, category: str, page: int = 0, page_size: int = 20
+    ) -> List[Tuple[str, Agent]]:
+        """(name, agent) pairs on one page of a category, in insertion order"""
+        start = page * page_size
+        with self._lock:
+            items = self._categories.get(category, {}).items()
+            return list(itertools.islice(items, start, start + page_size))
+
+    def _prefixed(self, prefix: str) -> Set[str]:
+        """Names of agents having a word that starts with prefix"""
+        index = bisect.bisect_left(self._vocabulary, prefix)
+        names: Set[str] = set()
+        while index < len(self._vocabulary) and self._vocabulary[index].startswith(
+            prefix
+        ):
+            names |= self._postings[self._vocabulary[index]]
+            index += 1
+        return names
+
+    def search(
+        self, query: str, category: Optional[str] = None, limit: int = 50
+    ) -> List[str]:
+        """
+        Names of agents matching every word of the query
+
+        Agents whose name starts with the query come first, then the rest
+        alphabetically.
+
+        Args:
+            query: Words to look for in names and instructions
+            category: Restrict the results to one category
+            limit: Maximum number of names returned
+        """
+        terms = _WORD.findall(query.lower())
+        if not terms:
+            return []
+        with self._lock:
+            matches = self._prefixed(terms[0])
+            for term in terms[1:]:
+                if not matches:
+                    break
+                matches &= self._prefixed(term)
+            if category is not None:
+                matches = {
+                    name for name in matches if self._agents[name][0] == category
+                }
+        needle = query.strip().lower()
+        ranked = sorted(
+            matches,
+            key=lambda name: (not name.lower().startswith(needle), name.lower()),
+        )
+        return ranked[:limit]
@@ -0,0 +1,148 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List
+
+from registry import function_key, registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AgentRecord:
+    """A persisted agent; functions are names registered in the registry"""
+
+    name: str
+    instructions: str
+    category: str = "custom"
+    functions: List[str] = field(default_factory=list)
+
+    def resolve_functions(self) -> List[Callable]:
+        """Registered functions for this agent, skipping unknown names"""
+        functions = []
+        for name in self.functions:
+            try:
+                functions.append(registry.function(name))
+            except KeyError:
+                logger.warning(f"Agent {self.name}: function {name} is not registered")
+        return functions
+
+
+def function_names(functions: Iterable) -> List[str]:
+    """Register callables and return the registry keys to persist"""
+    names = []
+    for func in functions:
+        if callable(func):
+            registry.register_function(func)
+            names.append(function_key(func))
+        elif isinstance(func, str):
+            names.append(func)
+    return names
+
+
+class AgentStore:
+    """
+    SQLite-backed agent definitions with per-agent upserts and deletes
+
+    Every write is its own transaction, so a crash never leaves a partially
+    written store, and loading is a single query regardless of agent count.
+    """
+
+    def __init__(self, path: str = "agents.db"):
+        """
+        Open (and create if needed) the agents table
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+        with self._connection() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS agents ("
+                "name TEXT PRIMARY KEY, category TEXT NOT NULL, "
+                "instructions TEXT NOT NULL, functions TEXT NOT NULL, "
+                "updated REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    @staticmethod
+    def _row(record: AgentRecord) -> tuple:
+        return (
+            record.name,
+            record.category,
+            record.instructions,
+            json.dumps(record.functions),
+            time.time(),
+        )
+
+    def upsert(self, record: AgentRecord) -> None:
+        self.upsert_many([record])
+
+    def upsert_many(self, records: Iterable[AgentRecord]) -> None:
+        """Insert or update several agents in one transaction"""
+        with self._connection() as db:
+            db.executemany(
+                "INSERT INTO agents (name, category, instructions, functions, updated) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(name) DO UPDATE SET "
+                "category = excluded.category, instructions = excluded.instructions, "
+                "functions = excluded.functions, updated = excluded.updated",
+                [self._row(record) for record in records],
+            )
+
+    def delete(self, name: str) -> None:
+        with self._connection() as db:
+            db.execute("DELETE FROM agents WHERE name = ?", (name,))
+
+    def load(self) -> List[AgentRecord]:
+        """Every stored agent, in insertion order"""
+        rows = self._connection().execute(
+            "SELECT name, instructions, category, functions FROM agents ORDER BY rowid"
+        )
+        return [
+            AgentRecord(name, instructions, category, json.loads(functions))
+            for name, instructions, category, functions in rows
+        ]
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM agents").fetchone()[0]
+
+    def import_json(self, path: str) -> List[AgentRecord]:
+        """
+        Import a legacy agents.json ({category: {name: {...}}})
+
+        Function entries that are not plain names cannot be restored and
+        are dropped.
+
+        Args:
+            path: Path of the JSON file
+
+        Returns:
+            The imported records
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        records = [
+            AgentRecord(
+                name=name,
+                instructions=item["instructions"],
+                category=category,
+                functions=function_names(item.get("functions", [])),
+            )
+            for category, agents in data.items()
+            for name, item in agents.items()
+        ]
+        self.upsert_many(records)
+        logger.info(f"Imported {len(records)} agents from {path}")
+        return records
@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import weakref
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import aio_pika
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRabbitMQ:
+    """
+    asyncio RabbitMQ wrapper mirroring rabbit.RabbitMQ
+
+    Many instances can share one connection (pass connection=...), each
+    getting its own channel, so hundreds of consumers can be multiplexed on
+    a single event loop.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 5672,
+        virtual_host: str = "/",
+        username: str = "guest",
+        password: str = "guest",
+        connection=None,
+        connect_factory: Optional[Callable[..., Awaitable]] = None,
+    ):
+        """
+        Initialize RabbitMQ connection parameters
+
+        Args:
+            host: RabbitMQ server hostname
+            port: RabbitMQ server port
+            virtual_host: Virtual host to connect to
+            username: Authentication username
+            password: Authentication password
+            connection: Existing connection to open a channel on
+            connect_factory: Coroutine used to open a connection, defaults to
+                aio_pika.connect_robust; pass membroker.MemoryBroker().connect
+                to run against the in-process broker
+        """
+        self.parameters = dict(
+            host=host,
+            port=port,
+            virtualhost=virtual_host,
+            login=username,
+            password=password,
+        )
+        self.connect_factory = connect_factory or aio_pika.connect_robust
+        self.connection = connection
+        self._owns_connection = connection is None
+        self.channel = None
+
+    async def connect(self) -> None:
+        """Establish connection (if not shared) and open a channel"""
+        if self.connection is None or self.connection.is_closed:
+            self.connection = await self.connect_factory(**self.parameters)
+            self._owns_connection = True
+            logger.info("Successfully connected to RabbitMQ")
+        if self.channel is None or self.channel.is_closed:
+            self.channel = await self.connection.channel()
+
+    async def close(self) -> None:
+        """Close the channel, and the connection if this instance opened it"""
+        if self.channel is not None and not self.channel.is_closed:
+            await self.channel.close()
+        if (
+            self._owns_connection
+            and self.connection is not None
+            and not self.connection.is_closed
+        ):
+            await self.connection.close()
+            logger.info("RabbitMQ connection closed")
+
+
+class AsyncRabbitConsumer(AsyncRabbitMQ):
+    """
+    asyncio RabbitMQ Consumer mirroring rabbit.RabbitConsumer
+    """
+
+    def __init__(self, queue_name: str, **kwargs):
+        """
+        Initialize consumer with queue name and optional connection parameters
+
+        Args:
+            queue_name: Name of the queue to consume from
+            **kwargs: Additional AsyncRabbitMQ parameters
+        """
+        super().__init__(**kwargs)
+        self.queue_name = queue_name
+        self.queue = None
+
+    async def setup_queue(self, durable: bool = True) -> None:
+        """
+        Declare the queue for consuming
+
+        Args:
+            durable: Whether the queue should survive broker restarts
+        """
+        self.queue = await self.channel.declare_queue(self.queue_name, durable=durable)
+
+    async def consume(
+        self,
+        callback: Callable[[bytes], Awaitable],
+        prefetch_count: int = 1,
+    ) -> None:
+        """
+        Consume messages with a coroutine callback until cancelled
+
+        Args:
+            callback: Coroutine function called with each message body
+            prefetch_count: Callbacks allowed to run concurrently
+        """
+
+        async def wrapped_callback(message):
+            try:
+                await callback(message.body)
+                await message.ack()
+            except Exception as e:
+                logger.error(f"Error processing message: {e}")
+                await message.nack()
+
+        await self.channel.set_qos(prefetch_count=prefetch_count)
+        consumer_tag = await self.queue.consume(wrapped_callback)
+        logger.info(f"Started consuming from queue: {self.queue_name}")
+        try:
+            await asyncio.Future()
+        finally:
+            if not self.channel.is_closed:
+                await self.queue.cancel(consumer_tag)
+
+    async def messages(self, prefetch_count: int = 1) -> AsyncIterator[bytes]:
+        """
+        Iterate over message bodies
+
+        A message is acked when the loop asks for the next one. Leaving the
+        loop early (break or exception) leaves the current message unacked,
+        so the broker redelivers it once the channel closes.
+
+        Args:
+            prefetch_count: Unacked messages buffered from the broker
+        """
+        await self.channel.set_qos(prefetch_count=prefetch_count)
+        async with self.queue.iterator() as queue_iter:
+            async for message in queue_iter:
+                yield message.body
+                await message.ack()
+
+    def __aiter__(self) -> AsyncIterator[bytes]:
+        return self.messages()
+
+    async def __aenter__(self):
+        await self.connect()
+        await self.setup_queue(True)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+class AsyncRabbitPublisher(AsyncRabbitMQ):
+    """
+    asyncio RabbitMQ Publisher mirroring rabbit.RabbitPublisher
+    """
+
+    def __init__(self, queue_name: str, **kwargs):
+        """
+        Initialize producer with queue name and optional connection parameters
+
+        Args:
+            queue_name: Name of the queue to publish to
+            **kwargs: Additional AsyncRabbitMQ parameters
+        """
+        super().__init__(**kwargs)
+        self.queue_name = queue_name
+
+    async def setup_queue(self, durable: bool = True) -> None:
+        """
+        Declare the queue for publishing
+
+        Args:
+            durable: Whether the queue should survive broker restarts
+        """
+        await self.channel.declare_queue(self.queue_name, durable=durable)
+
+    async def publish(self, message, queue_name: Optional[str] = None) -> None:
+        """
+        Publish a message to the queue
+
+        Args:
+            message: Message to publish (str or bytes)
+            queue_name: Override the publisher's queue
+        """
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        await self.channel.default_exchange.publish(
+            aio_pika.Message(body=message),
+            routing_key=queue_name or self.queue_name,
+        )
+        logger.debug(f"Published message to queue: {queue_name or self.queue_name}")
+
+    async def __aenter__(self):
+        await self.connect()
+        await self.setup_queue(True)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
+# Per event loop: ({connection kwargs: (publisher, declared queues)}, lock)
+_publishers = weakref.WeakKeyDictionary()
+
+
+async def publish(queue, message, **kwargs):
+    """
+    Publish over a publisher shared by the running event loop
+
+    Calls with the same connection parameters share one publisher; the
+    lock keeps concurrent first calls from opening extra connections.
+
+    Args:
+        queue: Name of the queue to publish to
+        message: Message body
+        **kwargs: AsyncRabbitMQ parameters
+    """
+    loop = asyncio.get_running_loop()
+    if loop not in _publishers:
+        _publishers[loop] = ({}, asyncio.Lock())
+    publishers, lock = _publishers[loop]
+    key = tuple(sorted(kwargs.items()))
+    async with lock:
+        state = publishers.get(key)
+        if state is None:
+            state = publishers[key] = (AsyncRabbitPublisher("", **kwargs), set())
+        publisher, declared = state
+        await publisher.connect()
+    if queue not in declared:
+        await publisher.channel.declare_queue(queue, durable=True)
+        declared.add(queue)
+    await publisher.publish(message, queue_name=queue)
@@ -0,0 +1,439 @@
+"""
+Throughput and latency benchmarks that need neither RabbitMQ nor a model
+
+    python bench.py                          # every scenario
+    python bench.py publish consume --messages 50000
+    python bench.py handoff --concurrency 1,8,32 --latency 0.2 --out run.json
+    python bench.py handoff --latency 0 --tokens-per-sec 0 --encode
+
+The production classes (RabbitPublisher, RabbitConsumer, RpcServer,
+RpcClient, Pipeline, RoutedSwarm) run unchanged on a LocalTransport and a
+FakeLLM, so results track the overhead of this code rather than of the
+network or the GPU. With --encode, envelopes are serialized as they would
+be for RabbitMQ, which isolates what the in-process transport saves. Each
+run writes a JSON report with msgs/s and latency percentiles per scenario,
+for regression tracking.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from swarm import Agent, Swarm
+
+from fakellm import FakeLLM
+from instrument import Histogram, instruments, to_json
+from marsh import AgentEnvelope, decode_envelope
+from metrics import emitter
+from models import LLAMA3_2
+from pipeline import Pipeline, Stage
+from rabbit import RabbitConsumer, RabbitPublisher
+from registry import registry
+from router import RoutedSwarm
+from rpc import RpcClient, RpcServer
+from transport import LocalTransport
+
+logger = logging.getLogger(__name__)
+
+# Agent queues and worker counts of newsq.build_news_pipeline
+NEWS_AGENTS = (("NewsGatherer", 4), ("ArticleWriter", 2), ("Publisher", 2))
+
+
+@dataclass
+class BenchResult:
+    """One scenario run at one setting"""
+
+    scenario: str
+    params: Dict[str, Any]
+    messages: int
+    seconds: float
+    latency: Optional[Histogram] = None
+
+    @property
+    def throughput(self) -> float:
+        return self.messages / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "scenario": self.scenario,
+            "params": self.params,
+            "messages": self.messages,
+            "seconds": self.seconds,
+            "msgs_per_sec": self.throughput,
+        }
+        if self.latency is not None:
+            result["latency"] = self.latency.summary()
+        return result
+
+
+class _Countdown:
+    """Calls done() from whichever thread handles the last message"""
+
+    def __init__(self, count: int, done: Callable[[], None]):
+        self.remaining = count
+        self.done = done
+        self._lock = threading.Lock()
+
+    def tick(self) -> None:
+        with self._lock:
+            self.remaining -= 1
+            finished = self.remaining == 0
+        if finished:
+            self.done()
+
+
+def _drive(
+    call: Callable[[int], Any], count: int, concurrency: int
+) -> Tuple[Histogram, float]:
+    """Run call(0..count-1) from concurrency threads, timing every call"""
+    latency = Histogram()
+
+    def timed(index: int) -> None:
+        started = time.perf_counter()
+        call(index)
+        latency.record(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # list() surfaces the first failure
+        list(pool.map(timed, range(count)))
+    return latency, time.perf_counter() - started
+
+
+def _agent_handler(client) -> Callable[[bytes], str]:
+    """The haiku_rcv.run_agent handler, on the given Swarm client"""
+
+    def run_agent(body) -> str:
+        envelope = decode_envelope(body)
+        response = client.run(
+            agent=registry.resolve(envelope.agent),
+            messages=envelope.messages,
+            context_variables=envelope.context_variables,
+        )
+        return response.messages[-1]["content"]
+
+    return run_agent
+
+
+@contextmanager
+def _serving(
+    transport: LocalTransport, queue: str, handler: Callable, workers: int
+) -> Iterator[RpcServer]:
+    server = RpcServer(queue, transport=transport)
+    server.emit_metrics = False
+    server.connect()
+    server.setup_queue(durable=False)
+    thread = threading.Thread(
+        target=server.serve, args=(handler,), kwargs={"workers": workers}, daemon=True
+    )
+    thread.start()
+    try:
+        yield server
+    finally:
+        server.stop()
+        thread.join()
+        server.close()
+
+
+def _envelope(ref: str, content: str, encode: bool):
+    envelope = AgentEnvelope(ref, [{"role": "user", "content": content}])
+    return bytes(envelope) if encode else envelope
+
+
+def bench_publish(messages: int = 10000, size: int = 256) -> List[BenchResult]:
+    """
+    Publish rate of RabbitPublisher, one basic_publish per message and
+    with confirmed batches (publish_many)
+
+    Args:
+        messages: Messages per run
+        size: Body size in bytes
+    """
+    body = b"x" * size
+    publisher = RabbitPublisher(
+        "bench.publish", transport=LocalTransport(max_length=None)
+    )
+    latency = Histogram()
+    started = time.perf_counter()
+    for _ in range(messages):
+        sent = time.perf_counter()
+        publisher.publish(body)
+        latency.record(time.perf_counter() - sent)
+    results = [
+        BenchResult(
+            "publish", {"size": size}, messages, time.perf_counter() - started, latency
+        )
+    ]
+
+    started = time.perf_counter()
+    outcomes = publisher.publish_many([body] * messages, batch_size=100)
+    elapsed = time.perf_counter() - started
+    acked = sum(1 for outcome in outcomes if outcome.acked)
+    if acked < messages:
+        logger.warning(f"Only {acked} of {messages} confirmed publishes were acked")
+    results.append(
+        BenchResult(
+            "publish_confirmed", {"size": size, "batch_size": 100}, acked, elapsed
+        )
+    )
+    publisher.close()
+    return results
+
+
+def bench_consume(
+    messages: int = 10000,
+    concurrency: Sequence[int] = (0, 1, 4, 16),
+    work: float = 0.0,
+    size: int = 256,
+) -> List[BenchResult]:
+    """
+    Drain rate of RabbitConsumer over a preloaded backlog
+
+    Args:
+        messages: Backlog size
+        concurrency: Worker pool sizes to try, 0 for inline callbacks
+        work: Seconds each callback sleeps, standing in for real work
+        size: Body size in bytes
+    """
+    results = []
+    for workers in concurrency:
+        transport = LocalTransport(max_length=None)
+        publisher = RabbitPublisher("bench.consume", transport=transport)
+        publisher.publish_many([b"x" * size] * messages, batch_size=500)
+        publisher.close()
+
+        consumer = RabbitConsumer("bench.consume", transport=transport)
+        consumer.emit_metrics = False
+        consumer.connect()
+        consumer.setup_queue()
+        countdown = _Countdown(messages, consumer.stop)
+
+        def handle(body: bytes) -> None:
+            if work:
+                time.sleep(work)
+            countdown.tick()
+
+        started = time.perf_counter()
+        consumer.consume(handle, workers=workers or None)
+        elapsed = time.perf_counter() - started
+        consumer.close()
+        results.append(
+            BenchResult(
+                "consume",
+                {"workers": workers, "work": work, "size": size},
+                messages,
+                elapsed,
+            )
+        )
+    return results
+
+
+def bench_handoff(
+    requests: int = 1000,
+    concurrency: Sequence[int] = (1, 4, 16),
+    llm: Optional[Dict[str, Any]] = None,
+    encode: bool = False,
+) -> List[BenchResult]:
+    """
+    Round trips of an AgentEnvelope handoff: RpcClient -> RpcServer running
+    the agent on a FakeLLM -> reply, as haiku_send/haiku_rcv do
+
+    Args:
+        requests: Calls per run
+        concurrency: Concurrent callers (and server workers) to try
+        llm: FakeLLM options
+        encode: Send encoded envelopes instead of the objects
+    """
+    results = []
+    for callers in concurrency:
+        transport = LocalTransport()
+        client = RoutedSwarm(Swarm(client=FakeLLM(**(llm or {}))))
+        ref = registry.register_agent(
+            Agent(name="BenchAgent", model=LLAMA3_2, instructions="Answer briefly.")
+        )
+        with _serving(
+            transport, "bench.handoff", _agent_handler(client), workers=callers
+        ):
+            with RpcClient(transport=transport) as rpc:
+                latency, elapsed = _drive(
+                    lambda i: rpc.call(
+                        "bench.handoff", _envelope(ref, f"request {i}", encode)
+                    ),
+                    requests,
+                    callers,
+                )
+        params = {"concurrency": callers, "encode": encode, **(llm or {})}
+        results.append(BenchResult("handoff", params, requests, elapsed, latency))
+    return results
+
+
+def bench_news_flow(
+    flows: int = 100,
+    concurrency: Sequence[int] = (1, 4, 16),
+    llm: Optional[Dict[str, Any]] = None,
+    encode: bool = False,
+) -> List[BenchResult]:
+    """
+    End-to-end news flows: the newsq pipeline shape, with every stage
+    handing off to its agent's RpcServer over the broker
+
+    Args:
+        flows: Queries per run
+        concurrency: Queries in flight to try
+        llm: FakeLLM options
+        encode: Send encoded envelopes instead of the objects
+    """
+    results = []
+    for in_flight in concurrency:
+        transport = LocalTransport()
+        client = RoutedSwarm(Swarm(client=FakeLLM(**(llm or {}))))
+        refs = {
+            name: registry.register_agent(
+                Agent(name=name, model=LLAMA3_2, instructions=f"You are the {name}.")
+            )
+            for name, _ in NEWS_AGENTS
+        }
+        with ExitStack() as stack:
+            for name, workers in NEWS_AGENTS:
+                stack.enter_context(
+                    _serving(transport, name, _agent_handler(client), workers)
+                )
+            rpc = stack.enter_context(RpcClient(transport=transport))
+
+            def handoff(name: str) -> Callable[[str], str]:
+                return lambda content: rpc.call(
+                    name, _envelope(refs[name], content, encode)
+                ).decode()
+
+            pipeline = stack.enter_context(
+                Pipeline(
+                    [
+                        Stage(name, handoff(name), workers=workers, maxsize=2 * workers)
+                        for name, workers in NEWS_AGENTS
+                    ]
+                )
+            )
+            latency, elapsed = _drive(
+                lambda i: pipeline.submit(f"news topic {i}").result(), flows, in_flight
+            )
+        params = {"concurrency": in_flight, "encode": encode, **(llm or {})}
+        results.append(BenchResult("news_flow", params, flows, elapsed, latency))
+    return results
+
+
+SCENARIOS = ("publish", "consume", "handoff", "news_flow")
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected scenarios and build the report"""
+    llm = {
+        "latency": args.latency,
+        "tokens_per_sec": args.tokens_per_sec,
+        "reply_tokens": args.reply_tokens,
+        "max_concurrency": args.model_concurrency,
+    }
+    concurrency = [int(value) for value in args.concurrency.split(",")]
+    results: List[BenchResult] = []
+    for scenario in args.scenarios or SCENARIOS:
+        print(f"Running {scenario}...", flush=True)
+        if scenario == "publish":
+            results += bench_publish(args.messages, args.size)
+        elif scenario == "consume":
+            results += bench_consume(
+                args.messages, [0] + concurrency, args.work, args.size
+            )
+        elif scenario == "handoff":
+            results += bench_handoff(args.requests, concurrency, llm, args.encode)
+        elif scenario == "news_flow":
+            results += bench_news_flow(args.flows, concurrency, llm, args.encode)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "results": [result.to_dict() for result in results],
+        "instruments": to_json(instruments),
+    }
+
+
+def _print(report: Dict[str, Any]) -> None:
+    for result in report["results"]:
+        params = ", ".join(f"{key}={value}" for key, value in result["params"].items())
+        line = (
+            f"{result['scenario']:<18} {result['msgs_per_sec']:>10.1f} msg/s  {params}"
+        )
+        latency = result.get("latency")
+        if latency:
+            line += "  " + " ".join(
+                f"{key}={latency[key] * 1000:.2f}ms" for key in ("p50", "p90", "p99")
+            )
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)}")
+    parser.add_argument(
+        "--messages", type=int, default=10000, help="Messages per publish/consume run"
+    )
+    parser.add_argument(
+        "--requests", type=int, default=1000, help="Calls per handoff run"
+    )
+    parser.add_argument(
+        "--flows", type=int, default=100, help="Queries per news_flow run"
+    )
+    parser.add_argument("--size", type=int, default=256, help="Message body bytes")
+    parser.add_argument(
+        "--work", type=float, default=0.0, help="Seconds of work per consumed message"
+    )
+    parser.add_argument(
+        "--concurrency", default="1,4,16", help="Comma-separated concurrency levels"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="Fake model time to first token"
+    )
+    parser.add_argument(
+        "--tokens-per-sec", type=float, default=2000.0, help="Fake model token rate"
+    )
+    parser.add_argument(
+        "--reply-tokens", type=int, default=50, help="Fake model words per reply"
+    )
+    parser.add_argument(
+        "--model-concurrency",
+        type=int,
+        default=None,
+        help="Fake model parallel requests",
+    )
+    parser.add_argument(
+        "--encode", action="store_true", help="Serialize envelopes as for RabbitMQ"
+    )
+    parser.add_argument("--out", default="bench.json", help="JSON report path")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    # rabbit turns on INFO logging at import; per-connection lines would
+    # drown the results
+    logging.getLogger().setLevel(logging.WARNING)
+    # Benchmarks must not publish metric events to a real broker
+    emitter.enabled = False
+    instruments.reset()
+
+    report = run(args)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    _print(report)
+    print(f"Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
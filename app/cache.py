@@ -0,0 +1,210 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache whose entries expire after ttl seconds
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty cache
+
+        Args:
+            maxsize: Entries kept before the least recently used is evicted
+            ttl: Seconds an entry stays valid, None for no expiry
+            clock: Time source, injectable for tests
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires = None if self.ttl is None else self.clock() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._data),
+        }
+
+
+class SqliteCache:
+    """
+    JSON-valued cache persisted in SQLite, shareable across processes
+
+    Expiry uses wall-clock time so every process agrees on it.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = 3600.0, table: str = "cache"):
+        """
+        Open (and create if needed) the cache table
+
+        Args:
+            path: SQLite database file
+            ttl: Seconds an entry stays valid, None for no expiry
+            table: Table name, lets several caches share one file
+        """
+        self.path = path
+        self.ttl = ttl
+        self.table = table
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        with self._connection() as db:
+            db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared between threads
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT value FROM {self.table} "
+                "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        expires = None if self.ttl is None else time.time() + self.ttl
+        with self._connection() as db:
+            db.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._connection() as db:
+            db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def prune(self) -> int:
+        """Delete expired rows and return how many were removed"""
+        with self._connection() as db:
+            cursor = db.execute(
+                f"DELETE FROM {self.table} WHERE expires IS NOT NULL AND expires <= ?",
+                (time.time(),),
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        with self._connection() as db:
+            db.execute(f"DELETE FROM {self.table}")
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class TieredCache:
+    """
+    Memory cache in front of an optional disk cache
+
+    Disk hits are promoted to memory; writes go to both tiers.
+    """
+
+    def __init__(self, memory: TTLCache, disk: Optional[SqliteCache] = None):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        value = self.memory.get(key)
+        if value is not MISSING:
+            return value
+        if self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Disk cache read failed: {e}")
+                value = MISSING
+            if value is not MISSING:
+                self.memory.set(key, value)
+                return value
+        return default
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                logger.warning(f"Disk cache write failed: {e}")
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"memory": self.memory.stats()}
+        if self.disk is not None:
+            stats["disk"] = self.disk.stats()
+        return stats
@@ -1,52 +1,76 @@
-import time
 from datetime import datetime
 
 import streamlit as st
 
+from metrics import MetricsAggregator, MetricsListener
 
-class DashboardState:
-    """Singleton class to store dashboard state"""
+REFRESH_SECONDS = 2
 
-    _instance = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(DashboardState, cls).__new__(cls)
-            cls._instance.metrics = {
-                "total_queries": 0,
-                "articles_generated": 0,
-                "last_update": None,
-                "agent_status": {},
-            }
-        return cls._instance
+@st.cache_resource
+def get_aggregator() -> MetricsAggregator:
+    """
+    One aggregate per server process, fed from the metrics exchange and
+    shared by every viewer
+    """
+    aggregator = MetricsAggregator()
+    MetricsListener(aggregator).start()
+    return aggregator
 
 
-def main():
-    st.title("News Swarm Dashboard")
+def _format_time(ts) -> str:
+    return datetime.fromtimestamp(ts).strftime("%H:%M:%S") if ts else "Never"
 
-    # Get dashboard state
-    dashboard = DashboardState()
 
-    # Sidebar metrics
-    st.sidebar.header("System Status")
-    st.sidebar.metric("Total Queries", dashboard.metrics["total_queries"])
-    st.sidebar.metric("Articles Generated", dashboard.metrics["articles_generated"])
+@st.fragment(run_every=REFRESH_SECONDS)
+def render_metrics(aggregator: MetricsAggregator):
+    snapshot = aggregator.snapshot()
+    totals = snapshot["totals"]
 
-    # Main content area
-    col1, col2, col3 = st.columns(3)
+    # System status (fragments cannot write to the sidebar)
+    st.subheader("System Status")
+    col1, col2 = st.columns(2)
+    col1.metric("Total Queries", totals.get("query", 0))
+    col2.metric("Articles Generated", totals.get("article", 0))
+    st.caption(f"Last update: {_format_time(snapshot['last_update'])}")
 
     # Agent status cards
-    for agent_name, status in dashboard.metrics["agent_status"].items():
-        with col1:
-            st.card(
-                title=agent_name,
-                text=f"Status: {status.get('status', 'Unknown')}\n"
-                f"Last Update: {status.get('last_update', 'Never')}",
-            )
-
-    # Auto-refresh every 5 seconds
-    time.sleep(5)
-    st.rerun()
+    columns = st.columns(3)
+    for index, (agent_name, status) in enumerate(
+        sorted(snapshot["agent_status"].items())
+    ):
+        with columns[index % 3]:
+            with st.container(border=True):
+                st.markdown(f"**{agent_name}**")
+                st.write(f"Status: {status.get('status', 'Unknown')}")
+                st.write(f"Last Update: {_format_time(status.get('last_update'))}")
+
+    # Rolling-window rates and latencies
+    st.subheader(f"Last {int(aggregator.window / 60)} minutes")
+    rates = snapshot["rates"]
+    col1, col2 = st.columns(2)
+    col1.metric("Queries / min", f"{rates.get('query', 0):.1f}")
+    col2.metric("Articles / min", f"{rates.get('article', 0):.1f}")
+    if snapshot["latency"]:
+        st.table(
+            [
+                {
+                    "name": name,
+                    "count": stats["count"],
+                    "p50 (s)": round(stats["p50"], 3),
+                    "p95 (s)": round(stats["p95"], 3),
+                    "max (s)": round(stats["max"], 3),
+                }
+                for name, stats in sorted(snapshot["latency"].items())
+            ]
+        )
+
+
+def main():
+    st.title("News Swarm Dashboard")
+    # Only the fragment reruns on the timer; reading the aggregate costs the
+    # workers nothing
+    render_metrics(get_aggregator())
 
 
 if __name__ == "__main__":
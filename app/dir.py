@@ -3,23 +3,23 @@ from typing import Dict, Optional
 
 from swarm import Agent, AgentMessage, Response, Swarm
 
-from models import model_list
+from llmcache import CachedSwarm
+from models import LLAMA3_2
 from prompts import *
 from rabbit import RabbitPublisher
 
 # Initialize SwarmRabbitMQ client
-client = Swarm()
+client = CachedSwarm(Swarm())
 rabbit_send = RabbitPublisher("aqueue")
 
-QWEN7 = 2
-LLAMA7 = 0
-GPT = 10
-MODEL = LLAMA7
+MODEL = LLAMA3_2
 
 print("\n=== News Director AI System ===")
 print("Type 'quit' to exit\n")
 
-def coordinate_news_flow(topic: str) -> Dict: """
+
+def coordinate_news_flow(topic: str) -> Dict:
+    """
     Coordinate the news gathering and publication process
     """
     return {
@@ -34,7 +34,7 @@ def coordinate_news_flow(topic: str) -> Dict: """
 
 news_director = Agent(
     name="NewsDirector",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a News Director responsible for:
     1. Deciding what topics to cover
     2. Coordinating the news gathering and writing process
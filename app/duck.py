@@ -1,20 +1,149 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
 from duckduckgo_search import DDGS
 
+from cache import MISSING, SqliteCache, TieredCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+TITLE_SIMILARITY = 0.9
+
+_cache = TieredCache(TTLCache(maxsize=512, ttl=900.0))
+
+
+def configure_cache(
+    maxsize: int = 512, ttl: float = 900.0, path: Optional[str] = None
+) -> TieredCache:
+    """
+    Replace the search cache; pass path to share results across processes
+    via SQLite
+    """
+    global _cache
+    disk = SqliteCache(path, ttl=ttl, table="news_search") if path else None
+    _cache = TieredCache(TTLCache(maxsize=maxsize, ttl=ttl), disk)
+    return _cache
+
+
+def cache_stats():
+    return _cache.stats()
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+def normalize_url(url):
+    """Lowercase host, drop www., tracking parameters, fragment and trailing /"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(
+        [(k, v) for k, v in parse_qsl(parts.query) if not k.startswith("utm_")]
+    )
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+
+def _search(query, max_results, ddgs) -> List[Dict]:
+    key = f"{max_results}:{normalize_query(query)}"
+    cached = _cache.get(key)
+    if cached is not MISSING:
+        return cached
+    results = [
+        {
+            "title": result["title"],
+            "link": result["link"],
+            "snippet": result["body"],
+        }
+        for result in ddgs.news(keywords=query, max_results=max_results)
+    ]
+    _cache.set(key, results)
+    return results
+
 
 def search_news(query, max_results=5):
     """
     Search for news articles using DuckDuckGo
+
+    Results are cached by normalized query and max_results; errors are not.
     """
     try:
         with DDGS() as ddgs:
-            results = list(ddgs.news(keywords=query, max_results=max_results))
-            return [
-                {
-                    "title": result["title"],
-                    "link": result["link"],
-                    "snippet": result["body"],
-                }
-                for result in results
-            ]
+            return _search(query, max_results, ddgs)
     except Exception as e:
         return f"Error searching news: {str(e)}"
+
+
+class Deduplicator:
+    """Drops articles already seen by normalized URL or near-identical title"""
+
+    def __init__(self, similarity: float = TITLE_SIMILARITY):
+        self.similarity = similarity
+        self.urls = set()
+        self.titles: List[str] = []
+
+    def is_new(self, article: Dict) -> bool:
+        url = normalize_url(article.get("link", ""))
+        title = normalize_query(article.get("title", ""))
+        if url and url in self.urls:
+            return False
+        for seen in self.titles:
+            if seen == title or (
+                SequenceMatcher(None, seen, title).ratio() >= self.similarity
+            ):
+                return False
+        self.urls.add(url)
+        self.titles.append(title)
+        return True
+
+
+def iter_search_news_many(
+    queries: Iterable[str], max_results=5, workers=4
+) -> Iterator[Dict]:
+    """
+    Run queries concurrently and yield deduplicated articles as they arrive
+
+    Failed queries are logged and skipped. Each article gets a "query" key
+    naming the query that found it first. Each worker thread opens one
+    DDGS session, reused for its queries and closed when the call ends.
+    """
+    unique = {}
+    for query in queries:
+        unique.setdefault(normalize_query(query), query)
+    queries = list(unique.values())
+    seen = Deduplicator()
+    local = threading.local()
+
+    with ExitStack() as sessions:
+
+        def run(query):
+            if not hasattr(local, "ddgs"):
+                local.ddgs = sessions.enter_context(DDGS())
+            return _search(query, max_results, local.ddgs)
+
+        # The pool is shut down before the sessions are closed
+        with ThreadPoolExecutor(max_workers=min(workers, len(queries) or 1)) as pool:
+            futures = {pool.submit(run, query): query for query in queries}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.warning(f"Search for {query!r} failed: {e}")
+                    continue
+                for article in results:
+                    if seen.is_new(article):
+                        yield {**article, "query": query}
+
+
+def search_news_many(queries, max_results=5, workers=4):
+    """
+    Search several queries in parallel and merge the deduplicated results
+    """
+    return list(iter_search_news_many(queries, max_results, workers))
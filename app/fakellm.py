@@ -0,0 +1,161 @@
+"""
+Deterministic stand-in for an OpenAI-compatible model server
+
+    client = Swarm(client=FakeLLM(latency=0.05, tokens_per_sec=200))
+
+FakeLLM answers chat.completions.create the way Ollama's OpenAI endpoint
+does, streamed or not, after a configurable time to first token and at a
+configurable token rate. Replies depend only on the prompt, so benchmark
+runs are repeatable without a GPU.
+"""
+
+import itertools
+import random
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk, ChatCompletionMessage
+from openai.types.chat.chat_completion import Choice
+from openai.types.chat.chat_completion_chunk import Choice as ChunkChoice
+from openai.types.chat.chat_completion_chunk import ChoiceDelta
+from openai.types.completion_usage import CompletionUsage
+
+WORDS = (
+    "the agent model queue message reply news article report swarm broker "
+    "latency token stream worker handoff result summary source topic draft"
+).split()
+
+
+def default_reply(messages: List[Dict], tokens: int) -> str:
+    """tokens pseudo-random words seeded by the last message"""
+    content = str(messages[-1].get("content") or "") if messages else ""
+    rng = random.Random(zlib.crc32(content.encode("utf-8")))
+    return " ".join(rng.choice(WORDS) for _ in range(tokens))
+
+
+class _Namespace:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class FakeLLM:
+    """
+    An OpenAI client lookalike with scripted timing
+
+    Requests beyond max_concurrency wait for a slot, like an inference
+    server with a fixed number of parallel sequences.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        tokens_per_sec: float = 200.0,
+        reply_tokens: int = 50,
+        max_concurrency: Optional[int] = None,
+        reply: Optional[Callable[[List[Dict], int], str]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the fake server
+
+        Args:
+            latency: Seconds before the first token
+            tokens_per_sec: Generation rate after the first token, 0 for instant
+            reply_tokens: Words per reply
+            max_concurrency: Requests served in parallel, None for unlimited
+            reply: reply(messages, reply_tokens) -> text, defaults to
+                default_reply
+            sleep: Delay function, e.g. a no-op for pure overhead runs
+        """
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.reply_tokens = reply_tokens
+        self.reply = reply or default_reply
+        self.sleep = sleep
+        self.calls = 0
+        self.tokens = 0
+        self._slots = (
+            threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        )
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.chat = _Namespace(completions=_Namespace(create=self.create))
+
+    def _pace(self, tokens: int) -> None:
+        if self.tokens_per_sec and tokens:
+            self.sleep(tokens / self.tokens_per_sec)
+
+    def _start(self, text: str) -> str:
+        with self._lock:
+            self.calls += 1
+            self.tokens += len(text.split())
+            return f"chatcmpl-fake-{next(self._ids)}"
+
+    def create(self, model: str, messages: List[Dict], stream: bool = False, **kwargs):
+        """chat.completions.create; tools and other options are ignored"""
+        text = self.reply(messages, self.reply_tokens)
+        completion_id = self._start(text)
+        if stream:
+            return self._stream(completion_id, model, text)
+        if self._slots:
+            self._slots.acquire()
+        try:
+            self.sleep(self.latency)
+            self._pace(max(0, len(text.split()) - 1))
+        finally:
+            if self._slots:
+                self._slots.release()
+        words = len(text.split())
+        prompt = sum(len(str(m.get("content") or "").split()) for m in messages)
+        return ChatCompletion(
+            id=completion_id,
+            object="chat.completion",
+            created=int(time.time()),
+            model=model,
+            choices=[
+                Choice(
+                    index=0,
+                    finish_reason="stop",
+                    message=ChatCompletionMessage(role="assistant", content=text),
+                )
+            ],
+            usage=CompletionUsage(
+                prompt_tokens=prompt,
+                completion_tokens=words,
+                total_tokens=prompt + words,
+            ),
+        )
+
+    def _chunk(self, completion_id: str, model: str, delta: ChoiceDelta, finish=None):
+        return ChatCompletionChunk(
+            id=completion_id,
+            object="chat.completion.chunk",
+            created=int(time.time()),
+            model=model,
+            choices=[ChunkChoice(index=0, delta=delta, finish_reason=finish)],
+        )
+
+    def _stream(
+        self, completion_id: str, model: str, text: str
+    ) -> Iterator[ChatCompletionChunk]:
+        if self._slots:
+            self._slots.acquire()
+        try:
+            self.sleep(self.latency)
+            for index, word in enumerate(text.split()):
+                if index:
+                    self._pace(1)
+                yield self._chunk(
+                    completion_id,
+                    model,
+                    ChoiceDelta(
+                        role="assistant" if index == 0 else None,
+                        content=word if index == 0 else f" {word}",
+                    ),
+                )
+            yield self._chunk(completion_id, model, ChoiceDelta(), finish="stop")
+        finally:
+            if self._slots:
+                self._slots.release()
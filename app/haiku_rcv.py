@@ -1,30 +1,48 @@
-import json
+import sys
 
 from swarm import Agent, Swarm
 
-from marsh import unmarshal_object
-from rabbit import consume
+from llmcache import CachedSwarm, cacheable
+from marsh import decode_envelope
+from registry import registry
+from router import RoutedSwarm
+from warmup import WarmupManager
+from rpc import serve
 
 MODEL = "llama3.2:latest"
+WARMUP_TIMEOUT = 600
 
-client = Swarm()
+client = CachedSwarm(RoutedSwarm(Swarm()))
 
 spanish_agent_name = "Spanish_Agent"
 
-spanish_agent = Agent(
-    name=spanish_agent_name,
-    model=MODEL,
-    instructions="You only speak Spanish.",
+registry.register_agent(
+    Agent(
+        name=spanish_agent_name,
+        model=MODEL,
+        instructions="You only speak Spanish.",
+    )
 )
+# Translations of a repeated message need not be sampled again
+cacheable(spanish_agent_name)
 
 
 def run_agent(body):
-    print(body)
+    envelope = decode_envelope(body)
+    print(envelope)
     response = client.run(
-        agent=spanish_agent, messages=json.loads(body.decode("utf-8"))
+        agent=registry.resolve(envelope.agent),
+        messages=envelope.messages,
+        context_variables=envelope.context_variables,
     )
 
     print(response.messages[-1]["content"])
+    return response.messages[-1]["content"]
 
 
-consume(spanish_agent_name, run_agent)
+# Only start taking messages once the model is resident; keep-alive retries
+# failed loads in the background while we wait
+warmup = WarmupManager.from_agents([registry.resolve(spanish_agent_name)])
+if not warmup.start() and not warmup.wait_ready(WARMUP_TIMEOUT):
+    sys.exit(f"Models not ready after {WARMUP_TIMEOUT}s: {warmup.failed}")
+serve(spanish_agent_name, run_agent, workers=4)
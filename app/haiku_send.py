@@ -1,21 +1,43 @@
-import json
-import marshal
-
 from swarm import Agent, Swarm
 
-from marsh import marshal_object
-from rabbit import publish
+from history import HistoryManager, swarm_summarizer
+from marsh import AgentEnvelope
+from registry import registry
+from rpc import RpcClient
 
 MODEL = "llama3.2:latest"
 client = Swarm()
+rpc = RpcClient().start()
 
 english_agent_name = "English_Agent"
 spanish_agent_name = "Spanish_Agent"
 
+spanish_agent_ref = registry.register_agent(
+    Agent(
+        name=spanish_agent_name,
+        model=MODEL,
+        instructions="You only speak Spanish.",
+    )
+)
+
+
+# One history for the conversation; each handoff adds only what is new in
+# messages, so earlier turns are not re-counted or re-summarized
+history = HistoryManager(MODEL, summarizer=swarm_summarizer(client, MODEL))
+synced = 0
+
 
 def transfer_to_spanish_agent():
     """Transfer spanish speaking users immediately."""
-    return publish(spanish_agent_name, json.dumps(messages))
+    global synced
+    history.extend(messages[synced:])
+    synced = len(messages)
+    # Encoded only when the Spanish agent is reached over RabbitMQ
+    reply = rpc.call(
+        spanish_agent_name,
+        AgentEnvelope(agent=spanish_agent_ref, messages=history.window()),
+    )
+    return reply.decode("utf-8")
 
 
 english_agent = Agent(
@@ -28,4 +50,5 @@ english_agent.functions.append(transfer_to_spanish_agent)
 
 messages = [{"role": "user", "content": "Hola. ¿Como estás?"}]
 response = client.run(agent=english_agent, messages=messages)
-print(english_agent)
+print(response.messages[-1]["content"])
+rpc.close()
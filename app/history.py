@@ -0,0 +1,166 @@
+import logging
+from typing import Callable, Dict, List, Optional
+
+from models import model_specs
+from prompts import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD = 4
+DEFAULT_CONTEXT = 8192
+
+Summarizer = Callable[[str, List[Dict]], str]
+
+
+def message_tokens(message: Dict) -> int:
+    tokens = MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+    for call in message.get("tool_calls") or []:
+        function = call.get("function", {})
+        tokens += count_tokens(function.get("name", "") + function.get("arguments", ""))
+    return tokens
+
+
+def swarm_summarizer(client, model: str) -> Summarizer:
+    """Summarizer that asks a model to fold old turns into the running summary"""
+    from swarm import Agent
+
+    agent = Agent(
+        name="Summarizer",
+        model=model,
+        instructions=(
+            "Summarize the conversation so far in a few sentences. Keep names, "
+            "facts, decisions and open questions; drop pleasantries."
+        ),
+    )
+
+    def summarize(summary: str, messages: List[Dict]) -> str:
+        transcript = "\n".join(
+            f"{m['role']}: {m.get('content') or ''}" for m in messages
+        )
+        prompt = f"Previous summary:\n{summary}\n\nNew turns:\n{transcript}"
+        response = client.run(
+            agent=agent, messages=[{"role": "user", "content": prompt}]
+        )
+        return response.messages[-1]["content"]
+
+    return summarize
+
+
+class HistoryManager:
+    """
+    Token-budgeted conversation window with rolling summarization
+
+    Every message is counted once when added. When the total exceeds the
+    budget, the oldest unpinned turns are folded into a summary (or dropped
+    without a summarizer) until the window fits. System messages and
+    messages added with pinned=True always stay. An assistant message with
+    tool_calls is never separated from the tool results that follow it.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        budget: Optional[int] = None,
+        reserve: int = 1024,
+        summarizer: Optional[Summarizer] = None,
+        keep_recent: int = 4,
+    ):
+        """
+        Initialize an empty history
+
+        Args:
+            model: Model whose context window sets the default budget
+            budget: Prompt tokens allowed, overrides the model's window
+            reserve: Tokens left free for the reply when deriving the budget
+            summarizer: summarizer(previous_summary, old_messages) -> summary
+            keep_recent: Messages never folded away, however tight the budget
+        """
+        if budget is None:
+            spec = model_specs.get(model)
+            budget = (spec.context if spec else DEFAULT_CONTEXT) - reserve
+        self.budget = budget
+        self.summarizer = summarizer
+        self.keep_recent = keep_recent
+        self.pinned: List[Dict] = []
+        self.recent: List[Dict] = []
+        self._recent_tokens: List[int] = []
+        self.summary = ""
+        self.summary_tokens = 0
+        self.pinned_tokens = 0
+        self.total = 0
+
+    def append(self, message: Dict, pinned: bool = False) -> None:
+        tokens = message_tokens(message)
+        if pinned or message.get("role") == "system":
+            self.pinned.append(message)
+            self.pinned_tokens += tokens
+        else:
+            self.recent.append(message)
+            self._recent_tokens.append(tokens)
+        self.total += tokens
+        if self.total > self.budget:
+            self._compact()
+
+    def extend(self, messages: List[Dict]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def _turn_end(self, start: int) -> int:
+        """Index after the turn starting at start (tool results stay attached)"""
+        end = start + 1
+        while end < len(self.recent) and self.recent[end].get("role") == "tool":
+            end += 1
+        return end
+
+    def _compact(self) -> None:
+        old: List[Dict] = []
+        freed = 0
+        limit = len(self.recent) - self.keep_recent
+        end = 0
+        while self.total - freed > self.budget and end < limit:
+            turn_end = min(self._turn_end(end), limit)
+            if turn_end <= end:
+                break
+            old.extend(self.recent[end:turn_end])
+            freed += sum(self._recent_tokens[end:turn_end])
+            end = turn_end
+        if not old:
+            return
+        # Leading tool results would be orphaned from their tool call
+        while end < len(self.recent) and self.recent[end].get("role") == "tool":
+            old.append(self.recent[end])
+            freed += self._recent_tokens[end]
+            end += 1
+        del self.recent[:end]
+        del self._recent_tokens[:end]
+        self.total -= freed
+        if self.summarizer is not None:
+            try:
+                self._set_summary(self.summarizer(self.summary, old))
+            except Exception as e:
+                logger.error(f"Summarization failed, dropping old turns: {e}")
+        logger.debug(f"Folded {len(old)} messages, window now {self.total} tokens")
+
+    def _set_summary(self, summary: str) -> None:
+        self.total -= self.summary_tokens
+        self.summary = summary
+        self.summary_tokens = message_tokens(self.summary_message()) if summary else 0
+        self.total += self.summary_tokens
+
+    def summary_message(self) -> Dict:
+        return {
+            "role": "system",
+            "content": f"Summary of the earlier conversation:\n{self.summary}",
+        }
+
+    def window(self) -> List[Dict]:
+        """Messages to send: pinned, then the summary, then recent turns"""
+        messages = list(self.pinned)
+        if self.summary:
+            messages.append(self.summary_message())
+        messages.extend(self.recent)
+        return messages
+
+    def __len__(self) -> int:
+        return len(self.pinned) + len(self.recent)
@@ -0,0 +1,325 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Header carrying the publish time (epoch seconds) for queue wait timing
+PUBLISHED_AT_HEADER = "x-published-at"
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Log-linear (HDR-style) histogram of non-negative values
+
+    Each power-of-two range above lowest is split into sub_buckets linear
+    buckets, so recording is O(1) and any quantile is reported within
+    1/sub_buckets relative error, whatever the spread of the values.
+    """
+
+    def __init__(self, sub_buckets: int = 32, lowest: float = 1e-6):
+        """
+        Initialize an empty histogram
+
+        Args:
+            sub_buckets: Linear buckets per power of two (precision)
+            lowest: Smallest distinguishable value; anything below shares
+                the first bucket
+        """
+        self.sub_buckets = sub_buckets
+        self.lowest = lowest
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self._counts: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        scaled = value / self.lowest
+        if scaled < 1:
+            return 0
+        mantissa, exponent = math.frexp(scaled)
+        return (
+            1
+            + (exponent - 1) * self.sub_buckets
+            + int((mantissa - 0.5) * 2 * self.sub_buckets)
+        )
+
+    def _upper(self, index: int) -> float:
+        if index == 0:
+            return self.lowest
+        exponent, sub = divmod(index - 1, self.sub_buckets)
+        width = self.lowest * 2**exponent / self.sub_buckets
+        return self.lowest * 2**exponent + (sub + 1) * width
+
+    def record(self, value: float) -> None:
+        index = self._index(value)
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += value
+            if value < self.min:
+                self.min = value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, quantile: float) -> float:
+        """Value at or below which the given fraction of samples fall"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, math.ceil(quantile * self.count))
+            seen = 0
+            for index in sorted(self._counts):
+                seen += self._counts[index]
+                if seen >= rank:
+                    return min(self._upper(index), self.max)
+            return self.max
+
+    def merge(self, other: "Histogram") -> None:
+        with other._lock:
+            counts = dict(other._counts)
+            count, total, low, high = other.count, other.sum, other.min, other.max
+        with self._lock:
+            for index, n in counts.items():
+                self._counts[index] = self._counts.get(index, 0) + n
+            self.count += count
+            self.sum += total
+            self.min = min(self.min, low)
+            self.max = max(self.max, high)
+
+    def summary(self) -> Dict[str, float]:
+        result = {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+        }
+        for quantile in QUANTILES:
+            result[f"p{int(quantile * 100)}"] = self.percentile(quantile)
+        return result
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Instruments:
+    """
+    Named, labelled latency histograms and counters
+
+    With enabled=False every call returns immediately, so instrumented
+    code costs next to nothing when nobody is measuring.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _labels(labels: Dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        key = (name, self._labels(labels))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name: str, seconds: float, **labels) -> None:
+        if self.enabled:
+            self.histogram(name, **labels).record(seconds)
+
+    def incr(self, name: str, amount: int = 1, **labels) -> None:
+        if self.enabled:
+            key = (name, self._labels(labels))
+            with self._lock:
+                self._counters[key] = self._counters.get(key, 0) + amount
+
+    @contextmanager
+    def _timer(self, name: str, labels: Dict) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histogram(name, **labels).record(time.perf_counter() - started)
+
+    def timer(self, name: str, **labels):
+        """Context manager recording the duration of its block"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name, labels)
+
+    def timed(self, name: str, **labels) -> Callable:
+        """Decorator recording every call's duration"""
+
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def histograms(self) -> List[Tuple[str, Dict[str, str], Histogram]]:
+        with self._lock:
+            items = list(self._histograms.items())
+        return [(name, dict(labels), histogram) for (name, labels), histogram in items]
+
+    def counters(self) -> List[Tuple[str, Dict[str, str], int]]:
+        with self._lock:
+            items = list(self._counters.items())
+        return [(name, dict(labels), value) for (name, labels), value in items]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+instruments = Instruments(enabled=os.environ.get("SWARM_INSTRUMENT", "1") != "0")
+
+
+def timer(name: str, **labels):
+    return instruments.timer(name, **labels)
+
+
+def observe(name: str, seconds: float, **labels) -> None:
+    instruments.observe(name, seconds, **labels)
+
+
+def tool(func: Callable) -> Callable:
+    """
+    Time a tool function under tool_call_seconds{tool=...} and trace it
+
+    Only for tools without a context_variables parameter: Swarm looks for
+    it in the function's own code object, which the wrapper hides.
+    """
+    timed = instruments.timed("tool_call_seconds", tool=func.__name__)(func)
+    return tracing.traced(f"tool {func.__name__}")(timed)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _prometheus_labels(labels: Dict[str, str], **extra) -> str:
+    merged = {**labels, **extra}
+    if not merged:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in merged.items())
+    return "{" + body + "}"
+
+
+def prometheus_text(source: Optional[Instruments] = None) -> str:
+    """Render histograms as Prometheus summaries and counters as counters"""
+    source = source or instruments
+    lines: List[str] = []
+    typed = set()
+    for name, labels, histogram in sorted(
+        source.histograms(), key=lambda item: item[0]
+    ):
+        if name not in typed:
+            lines.append(f"# TYPE {name} summary")
+            typed.add(name)
+        for quantile in QUANTILES:
+            lines.append(
+                f"{name}{_prometheus_labels(labels, quantile=quantile)} "
+                f"{histogram.percentile(quantile)}"
+            )
+        lines.append(f"{name}_sum{_prometheus_labels(labels)} {histogram.sum}")
+        lines.append(f"{name}_count{_prometheus_labels(labels)} {histogram.count}")
+    for name, labels, value in sorted(source.counters(), key=lambda item: item[0]):
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prometheus_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def to_json(source: Optional[Instruments] = None) -> Dict:
+    """Summaries of every histogram and counter as plain data"""
+    source = source or instruments
+    return {
+        "histograms": [
+            {"name": name, "labels": labels, **histogram.summary()}
+            for name, labels, histogram in source.histograms()
+        ],
+        "counters": [
+            {"name": name, "labels": labels, "value": value}
+            for name, labels, value in source.counters()
+        ],
+    }
+
+
+def dump_json(path: str, source: Optional[Instruments] = None) -> None:
+    with open(path, "w") as f:
+        json.dump(to_json(source), f, indent=2)
+
+
+def start_http_server(
+    port: int = 9108, host: str = "", source: Optional[Instruments] = None
+) -> HTTPServer:
+    """
+    Serve /metrics (Prometheus text) and /metrics.json from a daemon thread
+
+    Args:
+        port: Port to listen on
+        host: Interface to bind, all by default
+        source: Instruments to export, the process-wide ones by default
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body = prometheus_text(source).encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body = json.dumps(to_json(source)).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = HTTPServer((host, port), Handler)
+    threading.Thread(
+        target=server.serve_forever, name="metrics-http", daemon=True
+    ).start()
+    logger.info(f"Serving instrumentation on port {server.server_port}")
+    return server
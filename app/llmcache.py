@@ -0,0 +1,223 @@
+import copy
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from swarm import Agent, Swarm
+from swarm.types import Response
+from swarm.util import function_to_json
+
+from cache import MISSING, SqliteCache, TieredCache, TTLCache
+from models import model_specs
+from registry import registry
+
+logger = logging.getLogger(__name__)
+
+# Agents whose answers may be replayed even though their model samples
+_cacheable_agents: Set[str] = set()
+
+
+def cache_key(
+    agent: Agent,
+    messages: List[Dict],
+    context_variables: Optional[Dict] = None,
+    model_override: Optional[str] = None,
+    **run_options,
+) -> str:
+    """
+    Canonical hash of everything that determines a Swarm run's output:
+    model, instructions, tool schema, message history and run options
+    """
+    context_variables = context_variables or {}
+    instructions = (
+        agent.instructions(context_variables)
+        if callable(agent.instructions)
+        else agent.instructions
+    )
+    payload = {
+        "model": model_override or agent.model,
+        "instructions": instructions,
+        "tools": [function_to_json(f) for f in agent.functions],
+        "tool_choice": agent.tool_choice,
+        "parallel_tool_calls": agent.parallel_tool_calls,
+        "messages": messages,
+        "context_variables": context_variables,
+        "options": run_options,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _given(**kwargs) -> Dict:
+    """Keyword arguments the caller actually passed (non-default values)"""
+    return {name: value for name, value in kwargs.items() if value}
+
+
+def cacheable(*agent_names: str) -> None:
+    """
+    Opt agents into response caching: agents for which any good answer is
+    as good as another (translation, extraction, a fixed report query), so
+    replaying one beats sampling a new one
+    """
+    _cacheable_agents.update(agent_names)
+
+
+def is_deterministic(agent: Agent, model_override: Optional[str] = None) -> bool:
+    """Whether the run's model is served at temperature 0 (see ModelSpec)"""
+    spec = model_specs.get(model_override or agent.model)
+    return spec is not None and spec.temperature == 0
+
+
+class CachedSwarm:
+    """
+    Drop-in wrapper around a Swarm client that replays identical runs
+
+    Runs are keyed by cache_key and kept in an LRU+TTL memory tier with an
+    optional SQLite tier. Model servers sample by default, so only runs at
+    temperature 0 (see ModelSpec.temperature) are cached on their own;
+    other agents opt in through cacheable() or the agents argument. Swarm.run
+    takes no temperature, so a temperature keyword is only read here, never
+    forwarded, and a non-zero one bypasses the cache. Streaming runs and runs
+    that called tools (whose side effects a replay would skip) bypass it
+    too, and answers a wrapped RoutedSwarm got from a fallback model are not
+    stored. Calls that do not look like Swarm.run(agent, messages) are
+    passed through untouched.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Swarm] = None,
+        maxsize: int = 256,
+        ttl: Optional[float] = 3600.0,
+        path: Optional[str] = None,
+        cache_tool_calls: bool = False,
+        bypass: Optional[Callable[[Agent], bool]] = None,
+        agents: Optional[Iterable[str]] = None,
+    ):
+        """
+        Initialize the wrapper
+
+        Args:
+            client: Swarm client to wrap, a new one by default
+            maxsize: Responses kept in memory
+            ttl: Seconds a response stays valid, None for no expiry
+            path: SQLite file for the disk tier, None for memory only
+            cache_tool_calls: Also cache runs that executed tools
+            bypass: Extra predicate; agents for which it is true skip the cache
+            agents: Agent names to cache in addition to those opted in
+                through cacheable()
+        """
+        self.client = client or Swarm()
+        disk = SqliteCache(path, ttl=ttl, table="llm_responses") if path else None
+        self.cache = TieredCache(TTLCache(maxsize=maxsize, ttl=ttl), disk)
+        self.cache_tool_calls = cache_tool_calls
+        self.bypass = bypass
+        self.agents = set(agents or ())
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def _cacheable(
+        self,
+        agent: Agent,
+        stream: bool,
+        model_override: Optional[str] = None,
+        run_temperature: Optional[float] = None,
+    ) -> bool:
+        if stream:
+            return False
+        opted_in = agent.name in self.agents or agent.name in _cacheable_agents
+        # A requested temperature can only rule caching out: it is not sent
+        if run_temperature or not (opted_in or is_deterministic(agent, model_override)):
+            logger.debug(f"Not caching {agent.name}: it samples")
+            return False
+        return self.bypass is None or not self.bypass(agent)
+
+    def _load(self, key: str, agent: Agent) -> Optional[Response]:
+        entry = self.cache.get(key)
+        if entry is MISSING:
+            return None
+        final_agent = agent
+        if entry["agent"] is not None and entry["agent"] != agent.name:
+            try:
+                final_agent = registry.resolve(entry["agent"])
+            except KeyError:
+                # The run ended on an agent this process cannot rebuild
+                return None
+        return Response(
+            messages=copy.deepcopy(entry["messages"]),
+            agent=final_agent,
+            context_variables=copy.deepcopy(entry["context_variables"]),
+        )
+
+    def _store(self, key: str, response: Response, requested: str) -> None:
+        # A router may have answered with a fallback model (RoutedResponse)
+        used = getattr(response, "model", None)
+        if used is not None and used != requested:
+            logger.debug(f"Not caching a {used} answer under {requested}")
+            return
+        if not self.cache_tool_calls and any(
+            message.get("tool_calls") for message in response.messages
+        ):
+            return
+        self.cache.set(
+            key,
+            {
+                "messages": copy.deepcopy(response.messages),
+                "agent": response.agent.name if response.agent else None,
+                "context_variables": copy.deepcopy(response.context_variables),
+            },
+        )
+
+    def run(
+        self,
+        agent: Optional[Agent] = None,
+        messages: Optional[List] = None,
+        context_variables: Optional[Dict] = None,
+        model_override: Optional[str] = None,
+        stream: bool = False,
+        **kwargs,
+    ):
+        # Swarm.run has no temperature parameter
+        run_temperature = kwargs.pop("temperature", None)
+        if agent is None or messages is None:
+            return self.client.run(
+                **_given(
+                    agent=agent,
+                    messages=messages,
+                    context_variables=context_variables,
+                    model_override=model_override,
+                    stream=stream,
+                ),
+                **kwargs,
+            )
+        run_kwargs = dict(
+            agent=agent,
+            messages=messages,
+            context_variables=context_variables or {},
+            model_override=model_override,
+            stream=stream,
+            **kwargs,
+        )
+        if not self._cacheable(agent, stream, model_override, run_temperature):
+            return self.client.run(**run_kwargs)
+
+        key = cache_key(
+            agent,
+            messages,
+            context_variables,
+            model_override,
+            temperature=run_temperature,
+            **kwargs,
+        )
+        response = self._load(key, agent)
+        if response is not None:
+            logger.debug(f"LLM cache hit for {agent.name}")
+            return response
+        response = self.client.run(**run_kwargs)
+        self._store(key, response, model_override or agent.model)
+        return response
+
+    def stats(self):
+        return self.cache.stats()
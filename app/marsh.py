@@ -1,29 +1,171 @@
-import pickle
-from typing import Callable, List
+import json
+import struct
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
 
 from swarm import Agent
 
+from registry import AgentRegistry, registry
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - json fallback
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+ENVELOPE_MAGIC = b"SQ"
+ENVELOPE_VERSION = 1
+# magic, version, flags
+_HEADER = struct.Struct("!2sBB")
+
+FLAG_MSGPACK = 0x01
+COMPRESS_MASK = 0x06
+COMPRESS_ZSTD = 0x02
+COMPRESS_LZ4 = 0x04
+
+COMPRESS_THRESHOLD = 1024
+
+_local = threading.local()
+
 
 # Function to marshal the object
-def marshal_object(obj: Agent) -> bytes:
+def marshal_object(obj: Agent, agents: AgentRegistry = registry) -> bytes:
     """
-    Serialize the object to a byte stream using pickle.
+    Register the agent and return its agent_name@version reference.
 
-    :param obj: The ComplexObject to serialize
-    :return: Serialized byte stream
+    :param obj: The Agent to reference
+    :param agents: Registry shared with the receiving side
+    :return: UTF-8 encoded reference
     """
-    return pickle.dumps(obj)
+    return agents.register_agent(obj).encode("utf-8")
 
 
 # Function to unmarshal the object
-def unmarshal_object(serialized_obj: bytes) -> Agent:
+def unmarshal_object(serialized_obj: bytes, agents: AgentRegistry = registry) -> Agent:
     """
-    Deserialize the object from a byte stream using pickle.
+    Resolve a reference produced by marshal_object to a locally built Agent.
 
-    :param serialized_obj: Serialized byte stream
-    :return: Deserialized ComplexObject
+    :param serialized_obj: UTF-8 encoded agent_name@version reference
+    :param agents: Registry holding the agent's definition
+    :return: The cached Agent for that definition
     """
-    return pickle.loads(serialized_obj)
+    return agents.resolve(serialized_obj.decode("utf-8"))
+
+
+@dataclass
+class AgentEnvelope:
+    """
+    A handoff between agents: who should run, on what history and context.
+
+    The agent is an agent_name@version reference resolved through the
+    registry, never a serialized Agent.
+    """
+
+    agent: str
+    messages: List[Dict] = field(default_factory=list)
+    context_variables: Dict = field(default_factory=dict)
+
+    def __bytes__(self) -> bytes:
+        # How transports that need bytes put an envelope on the wire
+        return encode_envelope(self)
+
+
+def _zstd_compressor():
+    if not hasattr(_local, "zstd"):
+        _local.zstd = (zstandard.ZstdCompressor(), zstandard.ZstdDecompressor())
+    return _local.zstd
+
+
+def _compress(payload: bytes, compression: Optional[str]) -> Tuple[int, bytes]:
+    if compression in (None, "zstd") and zstandard is not None:
+        return COMPRESS_ZSTD, _zstd_compressor()[0].compress(payload)
+    if compression in (None, "lz4") and lz4_frame is not None:
+        return COMPRESS_LZ4, lz4_frame.compress(payload)
+    if compression is not None:
+        raise ValueError(f"Compression {compression} is not available")
+    return 0, payload
+
+
+def encode_envelope(
+    envelope: AgentEnvelope,
+    compress_threshold: int = COMPRESS_THRESHOLD,
+    compression: Optional[str] = None,
+) -> bytes:
+    """
+    Encode an envelope into the versioned binary wire format.
+
+    :param envelope: The AgentEnvelope to encode
+    :param compress_threshold: Bodies at least this many bytes are compressed
+    :param compression: "zstd" or "lz4", None picks the best available
+    :return: Header followed by the (optionally compressed) body
+    """
+    body = {
+        "a": envelope.agent,
+        "m": envelope.messages,
+        "c": envelope.context_variables,
+    }
+    if msgpack is not None:
+        flags = FLAG_MSGPACK
+        payload = msgpack.packb(body, use_bin_type=True)
+    else:
+        flags = 0
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+    if len(payload) >= compress_threshold:
+        compressed_flag, payload = _compress(payload, compression)
+        flags |= compressed_flag
+    return _HEADER.pack(ENVELOPE_MAGIC, ENVELOPE_VERSION, flags) + payload
+
+
+def decode_envelope(data: bytes) -> AgentEnvelope:
+    """
+    Decode bytes produced by encode_envelope.
+
+    An AgentEnvelope is returned as is: the in-process transport hands
+    handlers the object that was published.
+
+    :param data: Encoded envelope, or the envelope itself
+    :return: The decoded AgentEnvelope
+    """
+    if isinstance(data, AgentEnvelope):
+        return data
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != ENVELOPE_MAGIC:
+        raise ValueError("Not an agent envelope")
+    if version > ENVELOPE_VERSION:
+        raise ValueError(f"Unsupported envelope version {version}")
+    payload = memoryview(data)[_HEADER.size :]
+
+    compressed = flags & COMPRESS_MASK
+    if compressed == COMPRESS_ZSTD:
+        if zstandard is None:
+            raise ValueError("Envelope is zstd-compressed but zstandard is missing")
+        payload = _zstd_compressor()[1].decompress(payload)
+    elif compressed == COMPRESS_LZ4:
+        if lz4_frame is None:
+            raise ValueError("Envelope is lz4-compressed but lz4 is missing")
+        payload = lz4_frame.decompress(payload)
+
+    if flags & FLAG_MSGPACK:
+        if msgpack is None:
+            raise ValueError("Envelope is msgpack-encoded but msgpack is missing")
+        body = msgpack.unpackb(payload, raw=False)
+    else:
+        body = json.loads(bytes(payload))
+    return AgentEnvelope(
+        agent=body["a"],
+        messages=body.get("m", []),
+        context_variables=body.get("c", {}),
+    )
 
 
 def main():
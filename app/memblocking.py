@@ -0,0 +1,516 @@
+"""
+In-process stand-in for the subset of pika's BlockingConnection used by
+rabbit and rpc
+
+    broker = BlockingMemoryBroker()
+    consumer = RabbitConsumer("jobs", connect_factory=broker.connect)
+
+Like membroker.MemoryBroker does for arabbit, this keeps RabbitMQ's
+semantics that the code relies on: callbacks run on the thread that owns
+the connection (inside process_data_events or start_consuming),
+add_callback_threadsafe hands work to that thread, prefetch limits,
+ack/nack with requeue, competing consumers, publisher confirms, direct
+reply-to, and default, direct and fanout exchanges. Bodies are passed by
+reference, never copied or serialized. With max_length, publishers block
+while a queue holds that many undelivered messages.
+"""
+
+import copy
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import pika
+
+logger = logging.getLogger(__name__)
+
+REPLY_TO = "amq.rabbitmq.reply-to"
+
+
+class _Message:
+    __slots__ = ("body", "properties", "exchange", "routing_key", "redelivered")
+
+    def __init__(self, body, properties, exchange: str, routing_key: str):
+        self.body = body
+        self.properties = properties
+        self.exchange = exchange
+        self.routing_key = routing_key
+        self.redelivered = False
+
+
+class _Queue:
+    def __init__(self, name: str, exclusive_to=None, auto_delete: bool = False):
+        self.name = name
+        self.ready: Deque[_Message] = deque()
+        self.consumers: List["_Consumer"] = []
+        self.exclusive_to = exclusive_to
+        self.auto_delete = auto_delete
+        self._next = 0
+
+    def next_consumer(self) -> Optional["_Consumer"]:
+        """Round-robin over consumers whose channel has prefetch capacity"""
+        for _ in range(len(self.consumers)):
+            consumer = self.consumers[self._next % len(self.consumers)]
+            self._next += 1
+            if consumer.channel._has_capacity(consumer):
+                return consumer
+        return None
+
+
+class _Consumer:
+    def __init__(
+        self,
+        channel: "MemoryBlockingChannel",
+        tag: str,
+        queue: _Queue,
+        callback,
+        auto_ack: bool,
+    ):
+        self.channel = channel
+        self.tag = tag
+        self.queue = queue
+        self.callback = callback
+        self.auto_ack = auto_ack
+        self.cancelled = False
+
+
+class MemoryBlockingChannel:
+    """A channel with the pika BlockingChannel surface"""
+
+    def __init__(self, connection: "MemoryBlockingConnection", number: int):
+        self.connection = connection
+        self.broker = connection.broker
+        self.channel_number = number
+        self.is_open = True
+        self.prefetch_count = 0
+        self.consumers: Dict[str, _Consumer] = {}
+        self.unacked: Dict[int, Tuple[_Queue, _Message]] = {}
+        self._delivery_tags = itertools.count(1)
+        self._reply_queue: Optional[str] = None
+        self._confirm_callback = None
+        self._publish_seq = 0
+        # PublishBatch drives confirms through the async channel object
+        self._impl = self
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def _check_open(self) -> None:
+        if not self.is_open:
+            raise pika.exceptions.ChannelWrongStateError("Channel is closed")
+
+    def _has_capacity(self, consumer: _Consumer) -> bool:
+        return (
+            consumer.auto_ack
+            or not self.prefetch_count
+            or (len(self.unacked) < self.prefetch_count)
+        )
+
+    def queue_declare(
+        self,
+        queue: str = "",
+        passive: bool = False,
+        durable: bool = False,
+        exclusive: bool = False,
+        auto_delete: bool = False,
+        arguments=None,
+    ):
+        self._check_open()
+        declared = self.broker._declare(
+            queue, self.connection if exclusive else None, auto_delete, passive
+        )
+        return SimpleNamespace(
+            method=SimpleNamespace(
+                queue=declared.name,
+                message_count=len(declared.ready),
+                consumer_count=len(declared.consumers),
+            )
+        )
+
+    def exchange_declare(
+        self, exchange: str, exchange_type: str = "direct", **kwargs
+    ) -> None:
+        self._check_open()
+        self.broker._declare_exchange(exchange, str(exchange_type))
+
+    def queue_bind(
+        self, queue: str, exchange: str, routing_key: Optional[str] = None, **kwargs
+    ) -> None:
+        self._check_open()
+        self.broker._bind(
+            queue, exchange, routing_key if routing_key is not None else queue
+        )
+
+    def basic_qos(
+        self, prefetch_size: int = 0, prefetch_count: int = 0, global_qos: bool = False
+    ) -> None:
+        self.prefetch_count = prefetch_count
+
+    def basic_publish(
+        self,
+        exchange: str,
+        routing_key: str,
+        body,
+        properties: Optional[pika.BasicProperties] = None,
+        mandatory: bool = False,
+    ) -> None:
+        self._check_open()
+        if properties is not None and properties.reply_to == REPLY_TO:
+            if self._reply_queue is None:
+                raise pika.exceptions.ChannelClosedByBroker(
+                    406, "PRECONDITION_FAILED - fast reply consumer does not exist"
+                )
+            properties = copy.copy(properties)
+            properties.reply_to = self._reply_queue
+        self.broker._publish(
+            _Message(body, properties or pika.BasicProperties(), exchange, routing_key)
+        )
+        if self._confirm_callback is not None:
+            self._publish_seq += 1
+            frame = SimpleNamespace(
+                method=pika.spec.Basic.Ack(
+                    delivery_tag=self._publish_seq, multiple=False
+                )
+            )
+            self.connection._post(self._confirm_callback, frame)
+
+    def confirm_delivery(self, ack_nack_callback=None, callback=None) -> None:
+        """Confirm mode; every routed publish is acked right away"""
+        self._confirm_callback = ack_nack_callback
+        if callback is not None:
+            self.connection._post(
+                callback, SimpleNamespace(method=pika.spec.Confirm.SelectOk())
+            )
+
+    def basic_consume(
+        self,
+        queue: str,
+        on_message_callback: Callable,
+        auto_ack: bool = False,
+        exclusive: bool = False,
+        consumer_tag: Optional[str] = None,
+        arguments=None,
+    ) -> str:
+        self._check_open()
+        if queue == REPLY_TO:
+            if not auto_ack:
+                raise pika.exceptions.ChannelClosedByBroker(
+                    406, "PRECONDITION_FAILED - reply consumer cannot acknowledge"
+                )
+            self._reply_queue = f"{REPLY_TO}.{id(self):x}"
+            queue = self.broker._declare(
+                self._reply_queue, self.connection, True, False
+            ).name
+        tag = consumer_tag or f"ctag{self.channel_number}.{next(self.broker._tags)}"
+        self.broker._add_consumer(
+            _Consumer(self, tag, self.broker._get(queue), on_message_callback, auto_ack)
+        )
+        return tag
+
+    def basic_cancel(self, consumer_tag: str) -> None:
+        consumer = self.consumers.get(consumer_tag)
+        if consumer is not None:
+            self.broker._remove_consumer(consumer)
+
+    def _deliver(
+        self, consumer: _Consumer, message: _Message, delivery_tag: int
+    ) -> None:
+        # Runs on the connection's thread
+        if consumer.cancelled:
+            # Like pika, deliveries buffered for a cancelled consumer are requeued
+            if not consumer.auto_ack:
+                self.broker._settle(self, delivery_tag, requeue=True)
+            return
+        method = pika.spec.Basic.Deliver(
+            consumer_tag=consumer.tag,
+            delivery_tag=delivery_tag,
+            redelivered=message.redelivered,
+            exchange=message.exchange,
+            routing_key=message.routing_key,
+        )
+        consumer.callback(self, method, message.properties, message.body)
+
+    def basic_ack(self, delivery_tag: int = 0, multiple: bool = False) -> None:
+        self._check_open()
+        for tag in self._tags(delivery_tag, multiple):
+            self.broker._settle(self, tag, requeue=False)
+
+    def basic_nack(
+        self, delivery_tag: int = 0, multiple: bool = False, requeue: bool = True
+    ) -> None:
+        self._check_open()
+        for tag in self._tags(delivery_tag, multiple):
+            self.broker._settle(self, tag, requeue=requeue)
+
+    def basic_reject(self, delivery_tag: int = 0, requeue: bool = True) -> None:
+        self.basic_nack(delivery_tag, requeue=requeue)
+
+    def _tags(self, delivery_tag: int, multiple: bool) -> List[int]:
+        if not multiple:
+            return [delivery_tag]
+        return [tag for tag in list(self.unacked) if tag <= delivery_tag]
+
+    def start_consuming(self) -> None:
+        """Process events until every consumer on this channel is cancelled"""
+        while self.consumers and self.is_open:
+            self.connection.process_data_events(time_limit=0.05)
+
+    def stop_consuming(self, consumer_tag: Optional[str] = None) -> None:
+        for tag in [consumer_tag] if consumer_tag else list(self.consumers):
+            self.basic_cancel(tag)
+
+    def close(self) -> None:
+        if not self.is_open:
+            return
+        for tag in list(self.consumers):
+            self.basic_cancel(tag)
+        # Unacked deliveries go back to their queues
+        for tag in list(self.unacked):
+            self.broker._settle(self, tag, requeue=True)
+        self.is_open = False
+
+
+class MemoryBlockingConnection:
+    """A connection with the pika BlockingConnection surface"""
+
+    def __init__(self, broker: "BlockingMemoryBroker"):
+        self.broker = broker
+        self.is_open = True
+        self._channels: List[MemoryBlockingChannel] = []
+        self._events: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._numbers = itertools.count(1)
+
+    @property
+    def is_closed(self) -> bool:
+        return not self.is_open
+
+    def channel(self, channel_number: Optional[int] = None) -> MemoryBlockingChannel:
+        if not self.is_open:
+            raise pika.exceptions.ConnectionWrongStateError("Connection is closed")
+        channel = MemoryBlockingChannel(self, channel_number or next(self._numbers))
+        self._channels.append(channel)
+        return channel
+
+    def _post(self, func: Callable, *args) -> None:
+        self._events.put((func, args))
+
+    def add_callback_threadsafe(self, callback: Callable) -> None:
+        if not self.is_open:
+            raise pika.exceptions.ConnectionWrongStateError("Connection is closed")
+        self._post(callback)
+
+    def process_data_events(self, time_limit: Optional[float] = 0) -> None:
+        """
+        Run pending deliveries and callbacks on the calling thread
+
+        With time_limit=0 only what is already pending runs; otherwise
+        events are processed until time_limit seconds have passed (None
+        returns after the first event).
+        """
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            try:
+                if remaining is not None and remaining <= 0:
+                    func, args = self._events.get_nowait()
+                else:
+                    func, args = self._events.get(timeout=remaining)
+            except queue.Empty:
+                return
+            func(*args)
+            if deadline is None:
+                return
+
+    def sleep(self, duration: float) -> None:
+        self.process_data_events(time_limit=duration)
+
+    def close(self) -> None:
+        if not self.is_open:
+            return
+        for channel in self._channels:
+            channel.close()
+        self.broker._drop_exclusive(self)
+        self.is_open = False
+
+
+class BlockingMemoryBroker:
+    """
+    In-process broker for threaded code; each instance is an isolated
+    virtual host. connect() is a drop-in for pika.BlockingConnection.
+    """
+
+    def __init__(self, max_length: Optional[int] = None, publish_timeout: float = 30.0):
+        """
+        Initialize an empty broker
+
+        Args:
+            max_length: Undelivered messages a queue holds before publishers
+                block, None for unbounded
+            publish_timeout: Seconds a publisher waits for room before
+                failing with AMQPChannelError
+        """
+        self.max_length = max_length
+        self.publish_timeout = publish_timeout
+        self.queues: Dict[str, _Queue] = {}
+        self.exchanges: Dict[str, str] = {"": "direct"}
+        self.bindings: Dict[str, List[Tuple[str, str]]] = {}
+        self.connections = 0
+        self.published = 0
+        self._lock = threading.RLock()
+        self._space = threading.Condition(self._lock)
+        self._tags = itertools.count(1)
+        self._names = itertools.count(1)
+
+    def connect(self, parameters=None) -> MemoryBlockingConnection:
+        with self._lock:
+            self.connections += 1
+        return MemoryBlockingConnection(self)
+
+    def depth(self, name: str) -> int:
+        """Number of ready (undelivered) messages in a queue"""
+        with self._lock:
+            declared = self.queues.get(name)
+            return len(declared.ready) if declared else 0
+
+    def _get(self, name: str) -> _Queue:
+        declared = self.queues.get(name)
+        if declared is None:
+            raise pika.exceptions.ChannelClosedByBroker(
+                404, f"NOT_FOUND - no queue '{name}'"
+            )
+        return declared
+
+    def _declare(self, name: str, owner, auto_delete: bool, passive: bool) -> _Queue:
+        with self._lock:
+            if passive:
+                return self._get(name)
+            if not name:
+                name = f"amq.gen-{next(self._names)}"
+            declared = self.queues.get(name)
+            if declared is None:
+                declared = self.queues[name] = _Queue(name, owner, auto_delete)
+            return declared
+
+    def _declare_exchange(self, name: str, kind: str) -> None:
+        with self._lock:
+            self.exchanges.setdefault(name, kind)
+            self.bindings.setdefault(name, [])
+
+    def _bind(self, queue_name: str, exchange: str, routing_key: str) -> None:
+        with self._lock:
+            if exchange not in self.exchanges:
+                raise pika.exceptions.ChannelClosedByBroker(
+                    404, f"NOT_FOUND - no exchange '{exchange}'"
+                )
+            self._get(queue_name)
+            binding = (queue_name, routing_key)
+            if binding not in self.bindings[exchange]:
+                self.bindings[exchange].append(binding)
+
+    def _targets(self, exchange: str, routing_key: str) -> List[_Queue]:
+        if exchange == "":
+            declared = self.queues.get(routing_key)
+            return [declared] if declared else []
+        kind = self.exchanges.get(exchange)
+        if kind is None:
+            raise pika.exceptions.ChannelClosedByBroker(
+                404, f"NOT_FOUND - no exchange '{exchange}'"
+            )
+        return [
+            self.queues[name]
+            for name, key in self.bindings[exchange]
+            if name in self.queues and (kind == "fanout" or key == routing_key)
+        ]
+
+    def _publish(self, message: _Message) -> None:
+        with self._lock:
+            self.published += 1
+            targets = self._targets(message.exchange, message.routing_key)
+            if not targets:
+                logger.debug(f"Dropping unroutable message for {message.routing_key}")
+            for index, target in enumerate(targets):
+                self._wait_for_space(target)
+                # Fanout copies share the body; only the envelope differs
+                copy_ = (
+                    message
+                    if index == 0
+                    else _Message(
+                        message.body,
+                        message.properties,
+                        message.exchange,
+                        message.routing_key,
+                    )
+                )
+                target.ready.append(copy_)
+                self._dispatch(target)
+
+    def _wait_for_space(self, target: _Queue) -> None:
+        if self.max_length is None:
+            return
+        deadline = time.monotonic() + self.publish_timeout
+        while (
+            len(target.ready) >= self.max_length
+            and self.queues.get(target.name) is target
+        ):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._space.wait(remaining):
+                raise pika.exceptions.AMQPChannelError(
+                    f"Queue {target.name} stayed full for {self.publish_timeout}s"
+                )
+
+    def _dispatch(self, target: _Queue) -> None:
+        while target.ready:
+            consumer = target.next_consumer()
+            if consumer is None:
+                return
+            message = target.ready.popleft()
+            if self.max_length is not None:
+                self._space.notify_all()
+            channel = consumer.channel
+            tag = next(channel._delivery_tags)
+            if not consumer.auto_ack:
+                channel.unacked[tag] = (target, message)
+            channel.connection._post(channel._deliver, consumer, message, tag)
+
+    def _add_consumer(self, consumer: _Consumer) -> None:
+        with self._lock:
+            consumer.channel.consumers[consumer.tag] = consumer
+            consumer.queue.consumers.append(consumer)
+            self._dispatch(consumer.queue)
+
+    def _remove_consumer(self, consumer: _Consumer) -> None:
+        with self._lock:
+            consumer.cancelled = True
+            consumer.channel.consumers.pop(consumer.tag, None)
+            if consumer in consumer.queue.consumers:
+                consumer.queue.consumers.remove(consumer)
+
+    def _settle(self, channel: MemoryBlockingChannel, tag: int, requeue: bool) -> None:
+        with self._lock:
+            entry = channel.unacked.pop(tag, None)
+            if entry is None:
+                return
+            target, message = entry
+            if requeue:
+                message.redelivered = True
+                target.ready.appendleft(message)
+            # Freed prefetch capacity lets this channel's queues deliver again
+            queues: Set[str] = {c.queue.name for c in channel.consumers.values()}
+            queues.add(target.name)
+            for name in queues:
+                if name in self.queues:
+                    self._dispatch(self.queues[name])
+
+    def _drop_exclusive(self, owner: MemoryBlockingConnection) -> None:
+        with self._lock:
+            for name in [n for n, q in self.queues.items() if q.exclusive_to is owner]:
+                del self.queues[name]
+                for bindings in self.bindings.values():
+                    bindings[:] = [b for b in bindings if b[0] != name]
+            self._space.notify_all()
@@ -0,0 +1,255 @@
+"""
+In-process stand-in for the subset of aio_pika used by arabbit
+
+    broker = MemoryBroker()
+    consumer = AsyncRabbitConsumer("jobs", connect_factory=broker.connect)
+
+Queues, prefetch limits, ack/nack with requeue and competing consumers
+behave like RabbitMQ's; exchanges other than the default one do not exist.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryMessage:
+    """A delivered message, mimicking aio_pika.IncomingMessage"""
+
+    def __init__(self, queue: "MemoryQueue", body: bytes, headers: Dict, channel):
+        self.queue = queue
+        self.body = body
+        self.headers = headers
+        self.channel = channel
+        self.delivery_tag = next(channel._tags)
+        self.redelivered = False
+        self._settled = False
+
+    def _settle(self) -> None:
+        if self._settled:
+            raise RuntimeError("Message already acked or nacked")
+        self._settled = True
+        self.channel._delivered.discard(self)
+        self.channel._release()
+
+    async def ack(self, multiple: bool = False) -> None:
+        self._settle()
+
+    async def nack(self, multiple: bool = False, requeue: bool = True) -> None:
+        self._settle()
+        if requeue:
+            self.queue._requeue(self)
+
+    async def reject(self, requeue: bool = False) -> None:
+        await self.nack(requeue=requeue)
+
+
+class MemoryQueue:
+    """A named queue shared by every channel of a MemoryBroker"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self._tags = itertools.count(1)
+
+    def _put(self, body: bytes, headers: Dict, redelivered: bool = False) -> None:
+        self.messages.put_nowait((body, headers, redelivered))
+
+    def _requeue(self, message: MemoryMessage) -> None:
+        self._put(message.body, message.headers, redelivered=True)
+
+    def bind(self, channel: "MemoryChannel") -> "BoundQueue":
+        return BoundQueue(self, channel)
+
+
+class BoundQueue:
+    """A MemoryQueue as seen through one channel (aio_pika.Queue)"""
+
+    def __init__(self, queue: MemoryQueue, channel: "MemoryChannel"):
+        self.queue = queue
+        self.channel = channel
+        self.name = queue.name
+
+    async def consume(
+        self, callback: Callable[[MemoryMessage], Awaitable], **kwargs
+    ) -> str:
+        tag = f"ctag.{self.name}.{next(self.queue._tags)}"
+        self.queue._consumers[tag] = asyncio.create_task(self._deliver(callback))
+        self.channel._consumers.append((self.queue, tag))
+        return tag
+
+    async def _deliver(self, callback) -> None:
+        while True:
+            await self.channel._acquire()
+            try:
+                body, headers, redelivered = await self.queue.messages.get()
+            except asyncio.CancelledError:
+                self.channel._release()
+                raise
+            message = MemoryMessage(self.queue, body, headers, self.channel)
+            message.redelivered = redelivered
+            self.channel._delivered.add(message)
+            # Callbacks run concurrently up to the channel's prefetch limit
+            self.channel._spawn(self._run(callback, message))
+
+    @staticmethod
+    async def _run(callback, message: MemoryMessage) -> None:
+        try:
+            await callback(message)
+        except Exception as e:
+            logger.error(f"Unhandled error in consumer callback: {e}")
+            if not message._settled:
+                await message.nack()
+
+    async def cancel(self, consumer_tag: str) -> None:
+        task = self.queue._consumers.pop(consumer_tag, None)
+        if task is not None:
+            task.cancel()
+
+    def iterator(self) -> "MemoryQueueIterator":
+        return MemoryQueueIterator(self)
+
+
+class MemoryQueueIterator:
+    """Async iterator over a queue's deliveries (aio_pika.QueueIterator)"""
+
+    def __init__(self, queue: BoundQueue):
+        self.queue = queue
+        self._buffer: asyncio.Queue = asyncio.Queue()
+        self._tag: Optional[str] = None
+
+    async def __aenter__(self):
+        self._tag = await self.queue.consume(self._buffer.put)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.queue.cancel(self._tag)
+        while not self._buffer.empty():
+            await self._buffer.get_nowait().nack()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> MemoryMessage:
+        return await self._buffer.get()
+
+
+class MemoryExchange:
+    """The default exchange: routes by queue name"""
+
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+
+    async def publish(self, message, routing_key: str, **kwargs) -> None:
+        queue = self.broker.queues.get(routing_key)
+        if queue is None:
+            logger.debug(f"Dropping unroutable message for {routing_key}")
+            return
+        queue._put(message.body, dict(getattr(message, "headers", None) or {}))
+
+
+class MemoryChannel:
+    """A channel with an aio_pika-compatible surface"""
+
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+        self.default_exchange = MemoryExchange(broker)
+        self.is_closed = False
+        self._tags = itertools.count(1)
+        self._prefetch = 0
+        self._unacked = 0
+        self._capacity = asyncio.Condition()
+        self._consumers: List = []
+        self._delivered = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def set_qos(self, prefetch_count: int = 0, **kwargs) -> None:
+        self._prefetch = prefetch_count
+        async with self._capacity:
+            self._capacity.notify_all()
+
+    async def _acquire(self) -> None:
+        async with self._capacity:
+            await self._capacity.wait_for(
+                lambda: not self._prefetch or self._unacked < self._prefetch
+            )
+            self._unacked += 1
+
+    def _release(self) -> None:
+        self._unacked -= 1
+        self._spawn(self._notify())
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        # The event loop only keeps weak references to tasks
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _notify(self) -> None:
+        async with self._capacity:
+            self._capacity.notify()
+
+    async def declare_queue(
+        self, name: str, durable: bool = False, **kwargs
+    ) -> BoundQueue:
+        return self.broker.declare(name).bind(self)
+
+    async def close(self) -> None:
+        for queue, tag in self._consumers:
+            task = queue._consumers.pop(tag, None)
+            if task is not None:
+                task.cancel()
+        # Like RabbitMQ, unacked deliveries go back to their queue
+        for message in list(self._delivered):
+            message._settled = True
+            message.queue._requeue(message)
+        self._delivered.clear()
+        self.is_closed = True
+
+
+class MemoryConnection:
+    def __init__(self, broker: "MemoryBroker"):
+        self.broker = broker
+        self.is_closed = False
+        self._channels: List[MemoryChannel] = []
+
+    async def channel(self) -> MemoryChannel:
+        channel = MemoryChannel(self.broker)
+        self._channels.append(channel)
+        return channel
+
+    async def close(self) -> None:
+        for channel in self._channels:
+            if not channel.is_closed:
+                await channel.close()
+        self.is_closed = True
+
+
+class MemoryBroker:
+    """
+    In-process broker; each instance is an isolated virtual host
+    """
+
+    def __init__(self):
+        self.queues: Dict[str, MemoryQueue] = {}
+        self.connections = 0
+
+    def declare(self, name: str) -> MemoryQueue:
+        if name not in self.queues:
+            self.queues[name] = MemoryQueue(name)
+        return self.queues[name]
+
+    async def connect(self, **parameters) -> MemoryConnection:
+        """Drop-in for aio_pika.connect_robust"""
+        self.connections += 1
+        return MemoryConnection(self)
+
+    def depth(self, name: str) -> int:
+        """Number of ready (undelivered) messages in a queue"""
+        queue = self.queues.get(name)
+        return queue.messages.qsize() if queue else 0
@@ -0,0 +1,286 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import pika
+
+from rabbit import RabbitConsumer, connection_parameters, get_pool
+
+logger = logging.getLogger(__name__)
+
+METRICS_EXCHANGE = "swarm.metrics"
+
+
+class MetricsEmitter:
+    """
+    Fire-and-forget publisher of metric events to a fanout exchange
+
+    emit() only appends to a bounded in-process queue; a background thread
+    publishes the queued events in batches, one message per batch. Events
+    are dropped (and counted) rather than ever blocking the caller, and
+    nothing here depends on how many dashboards are listening.
+    """
+
+    def __init__(
+        self,
+        exchange: str = METRICS_EXCHANGE,
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        retry_after: float = 30.0,
+        maxsize: int = 10000,
+        send: Optional[Callable[[str, bytes], None]] = None,
+        enabled: Optional[bool] = None,
+        **connection_kwargs,
+    ):
+        """
+        Initialize the emitter; the publishing thread starts on first emit
+
+        Args:
+            exchange: Fanout exchange receiving the events
+            flush_interval: Seconds between batch publishes
+            batch_size: Events per published message
+            retry_after: Seconds to drop events after the broker was unreachable
+            maxsize: Events buffered before new ones are dropped
+            send: send(exchange, body) publishes one batch, defaults to a
+                pooled RabbitMQ channel
+            enabled: Emit at all; defaults to SWARM_METRICS != "0"
+            **connection_kwargs: Connection parameters, see connection_parameters
+        """
+        self.exchange = exchange
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.retry_after = retry_after
+        self.send = send or self._publish
+        self.enabled = (
+            os.environ.get("SWARM_METRICS", "1") != "0" if enabled is None else enabled
+        )
+        self.source = f"{socket.gethostname()}:{os.getpid()}"
+        self.dropped = 0
+        # Metrics are best effort: one quick attempt, never the default retries
+        self._parameters = connection_parameters(
+            **{"connection_attempts": 1, "retry_delay": 0, **connection_kwargs}
+        )
+        self._paused_until = 0.0
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._declared = False
+
+    def emit(self, kind: str, **fields) -> None:
+        """
+        Record an event
+
+        Args:
+            kind: Event type, e.g. "query", "article", "agent_status", "latency"
+            **fields: Event data (name, agent, status, seconds, ...)
+        """
+        if not self.enabled:
+            return
+        event = {"kind": kind, "ts": time.time(), "source": self.source, **fields}
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="metrics-emitter", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _publish(self, exchange: str, body: bytes) -> None:
+        with get_pool().channel(self._parameters) as pooled:
+            if not self._declared:
+                pooled.channel.exchange_declare(
+                    exchange=exchange, exchange_type="fanout"
+                )
+                self._declared = True
+            pooled.channel.basic_publish(exchange=exchange, routing_key="", body=body)
+
+    def _drain(self) -> List[Dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        """Publish everything queued so far"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                return
+            if time.monotonic() < self._paused_until:
+                self.dropped += len(batch)
+                continue
+            try:
+                self.send(self.exchange, json.dumps(batch).encode("utf-8"))
+            except Exception as e:
+                self.dropped += len(batch)
+                self._paused_until = time.monotonic() + self.retry_after
+                logger.warning(f"Dropped {len(batch)} metric events: {e}")
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+emitter = MetricsEmitter()
+
+
+def emit(kind: str, **fields) -> None:
+    """Record an event on the process-wide emitter"""
+    emitter.emit(kind, **fields)
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class MetricsAggregator:
+    """
+    Rolling-window view over metric events
+
+    Totals count every event since start; rates and latency percentiles
+    cover the last window seconds. Agent status keeps the latest report
+    per agent.
+    """
+
+    def __init__(self, window: float = 300.0, clock: Callable[[], float] = time.time):
+        """
+        Initialize an empty aggregate
+
+        Args:
+            window: Seconds covered by rates and latency percentiles
+            clock: Time source, seconds since the epoch
+        """
+        self.window = window
+        self.clock = clock
+        self.totals: Counter = Counter()
+        self.agent_status: Dict[str, Dict[str, Any]] = {}
+        self.last_update: Optional[float] = None
+        self._recent: Deque[Tuple[float, str]] = deque()
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def handle(self, event: Dict) -> None:
+        kind = event.get("kind")
+        ts = event.get("ts", self.clock())
+        with self._lock:
+            self.totals[kind] += 1
+            self._recent.append((ts, kind))
+            self.last_update = max(self.last_update or ts, ts)
+            if kind == "agent_status":
+                self.agent_status[event["agent"]] = {
+                    "status": event.get("status", "unknown"),
+                    "last_update": ts,
+                    "source": event.get("source"),
+                }
+            if "seconds" in event:
+                name = event.get("name") or kind
+                self._latencies.setdefault(name, deque()).append((ts, event["seconds"]))
+            self._prune(self.clock())
+
+    def feed(self, body: bytes) -> None:
+        """Consume one published batch (a JSON list of events)"""
+        for event in json.loads(body):
+            self.handle(event)
+
+    def _prune(self, now: float) -> None:
+        horizon = now - self.window
+        while self._recent and self._recent[0][0] < horizon:
+            self._recent.popleft()
+        for name in list(self._latencies):
+            samples = self._latencies[name]
+            while samples and samples[0][0] < horizon:
+                samples.popleft()
+            if not samples:
+                del self._latencies[name]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals, per-minute rates, latencies and agent status"""
+        with self._lock:
+            self._prune(self.clock())
+            recent = Counter(kind for _, kind in self._recent)
+            minutes = self.window / 60
+            return {
+                "totals": dict(self.totals),
+                "rates": {kind: count / minutes for kind, count in recent.items()},
+                "latency": {
+                    name: {
+                        "count": len(samples),
+                        "p50": _percentile([s for _, s in samples], 0.5),
+                        "p95": _percentile([s for _, s in samples], 0.95),
+                        "max": max(s for _, s in samples),
+                    }
+                    for name, samples in self._latencies.items()
+                },
+                "agent_status": {
+                    agent: dict(status) for agent, status in self.agent_status.items()
+                },
+                "last_update": self.last_update,
+            }
+
+
+class MetricsListener(RabbitConsumer):
+    """
+    Feeds a MetricsAggregator from the metrics exchange
+
+    Each listener binds its own exclusive, auto-deleted queue, so any
+    number of them can run without affecting the workers emitting events.
+    """
+
+    emit_metrics = False
+
+    def __init__(
+        self,
+        aggregator: MetricsAggregator,
+        exchange: str = METRICS_EXCHANGE,
+        **kwargs,
+    ):
+        super().__init__(queue_name="", **kwargs)
+        self.aggregator = aggregator
+        self.exchange = exchange
+        self._thread: Optional[threading.Thread] = None
+
+    def setup_queue(self, durable: bool = False) -> None:
+        self.channel.exchange_declare(exchange=self.exchange, exchange_type="fanout")
+        result = self.channel.queue_declare(queue="", exclusive=True, auto_delete=True)
+        self.queue_name = result.method.queue
+        self.channel.queue_bind(queue=self.queue_name, exchange=self.exchange)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.connect()
+                self.setup_queue()
+                self.consume(self.aggregator.feed, prefetch_count=100)
+                return
+            except pika.exceptions.AMQPError as e:
+                logger.warning(f"Metrics listener disconnected, retrying: {e}")
+                time.sleep(5)
+
+    def start(self) -> "MetricsListener":
+        """Listen in a background thread"""
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-listener", daemon=True
+        )
+        self._thread.start()
+        return self
@@ -1,13 +1,77 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+LLAMA3_2 = "llama3.2:latest"
+QWEN_CODER_32B = "qwen2.5-coder:32b"
+QWEN_CODER_7B = "qwen2.5-coder:7b"
+DEEPSEEK_CODER_V2 = "deepseek-coder-v2:latest"
+BIELIK_11B = "hf.co/speakleash/Bielik-11B-v2.3-Instruct-GGUF:Q4_K_M"
+LLAVA_13B = "llava:13b"
+GEMMA2_27B = "gemma2:27b"
+MISTRAL = "mistral:latest"
+NOMIC_EMBED = "nomic-embed-text:latest"
+LLAMA3_1 = "llama3.1:latest"
+GPT_4O = "gpt-4o"
+
 model_list = [
-    "llama3.2:latest",
-    "qwen2.5-coder:32b",
-    "qwen2.5-coder:7b",
-    "deepseek-coder-v2:latest",
-    "hf.co/speakleash/Bielik-11B-v2.3-Instruct-GGUF:Q4_K_M",
-    "llava:13b",
-    "gemma2:27b",
-    "mistral:latest",
-    "nomic-embed-text:latest",
-    "llama3.1:latest",
-    "gpt-4o",
+    LLAMA3_2,
+    QWEN_CODER_32B,
+    QWEN_CODER_7B,
+    DEEPSEEK_CODER_V2,
+    BIELIK_11B,
+    LLAVA_13B,
+    GEMMA2_27B,
+    MISTRAL,
+    NOMIC_EMBED,
+    LLAMA3_1,
+    GPT_4O,
 ]
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """
+    What the router knows about a model
+
+    cost is relative (llama3.2 = 1), latency is typical seconds per
+    request, context is the window in tokens and max_concurrency the
+    requests the inference box serves in parallel without thrashing.
+    local models are served by Ollama; embedding models are loaded with
+    an embed call rather than a generate call. temperature is the one the
+    server samples with: Ollama's default of 0.8 unless a Modelfile says
+    otherwise, OpenAI's default of 1 for hosted models.
+    """
+
+    name: str
+    cost: float
+    latency: float
+    context: int
+    max_concurrency: int
+    fallback: Optional[str] = None
+    local: bool = True
+    embedding: bool = False
+    temperature: float = 0.8
+
+
+model_specs: Dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in [
+        ModelSpec(LLAMA3_2, cost=1, latency=2, context=131072, max_concurrency=8),
+        ModelSpec(
+            QWEN_CODER_32B, 8, 20, 32768, max_concurrency=1, fallback=QWEN_CODER_7B
+        ),
+        ModelSpec(QWEN_CODER_7B, 2, 5, 32768, max_concurrency=4, fallback=LLAMA3_2),
+        ModelSpec(
+            DEEPSEEK_CODER_V2, 4, 10, 131072, max_concurrency=2, fallback=QWEN_CODER_7B
+        ),
+        ModelSpec(BIELIK_11B, 3, 8, 32768, max_concurrency=2, fallback=LLAMA3_2),
+        ModelSpec(LLAVA_13B, 4, 10, 4096, max_concurrency=2),
+        ModelSpec(GEMMA2_27B, 7, 18, 8192, max_concurrency=1, fallback=LLAMA3_1),
+        ModelSpec(MISTRAL, 2, 5, 32768, max_concurrency=4, fallback=LLAMA3_2),
+        ModelSpec(NOMIC_EMBED, 0.1, 0.2, 8192, max_concurrency=8, embedding=True),
+        ModelSpec(LLAMA3_1, 2, 5, 131072, max_concurrency=4, fallback=LLAMA3_2),
+        ModelSpec(
+            GPT_4O, 20, 4, 128000, max_concurrency=16, local=False, temperature=1.0
+        ),
+    ]
+}
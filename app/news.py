@@ -1,16 +1,18 @@
 from swarm import Agent, Swarm
 
 from duck import search_news
-from models import model_list
+from llmcache import CachedSwarm, cacheable
+from models import LLAMA3_2
 from prompts import *
+from registry import registry
+from router import RoutedSwarm
+from warmup import WarmupManager
 
-client = Swarm()
+# The handoffs and searches have no side effects, so runs that used tools
+# may be replayed too
+client = CachedSwarm(RoutedSwarm(Swarm()), cache_tool_calls=True)
 
-QWEN7 = 2
-LLAMA7 = 0
-GPT = 10
-
-MODEL = LLAMA7
+MODEL = LLAMA3_2
 
 
 def search_news_agent(q=None, query=None):
@@ -30,7 +32,7 @@ def publish_article(article=None):
 
 news_director = Agent(
     name="NewsDirector",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a News Director responsible for:
     1. Deciding what topics to cover
     2. Coordinating the news gathering and writing process
@@ -43,7 +45,7 @@ news_director = Agent(
 
 news_gatherer = Agent(
     name="NewsGatherer",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a News Researcher who:
     1. Takes a topic or query
     2. Uses the search_news function to gather relevant information
@@ -55,7 +57,7 @@ news_gatherer = Agent(
 
 article_writer = Agent(
     name="ArticleWriter",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a Professional Writer who:
     1. Takes researched information
     2. Creates engaging, well-structured articles
@@ -67,7 +69,7 @@ article_writer = Agent(
 
 publisher = Agent(
     name="Publisher",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a Content Publisher who:
     1. Takes the final article
     2. Formats it for WordPress
@@ -76,6 +78,16 @@ publisher = Agent(
     
     Ensure proper formatting and metadata.""",
 )
+# Re-running the fixed query below replays the last answer; the registry
+# rebuilds whichever agent the cached run ended on
+for agent in [news_director, news_gatherer, article_writer, publisher]:
+    registry.register_agent(agent)
+    cacheable(agent.name)
+
+WarmupManager.from_agents(
+    [news_director, news_gatherer, article_writer, publisher]
+).start()
+
 response = client.run(
     agent=news_director,
     messages=[
@@ -1,12 +1,18 @@
 import logging
 import time
-from typing import Optional
-
-from duck import search_news
-from models import model_list
+from typing import List, Optional
+
+from duck import search_news, search_news_many
+import tracing
+from instrument import instruments, tool
+from metrics import emit
+from models import LLAMA3_2
+from pipeline import Pipeline, Stage
 from prompts import *
+from router import RoutedSwarm
+from streaming import ChunkStream, publish_chunks, stream_agent
 
-from swarm import Agent, AgentMessage, RabbitMQConfig, SwarmRabbitMQ
+from swarm import Agent, AgentMessage, RabbitMQConfig, Swarm, SwarmRabbitMQ
 
 # Set up logging
 logging.basicConfig(
@@ -25,24 +31,35 @@ client = SwarmRabbitMQ(
     )
 )
 
+# Plain client for token streaming (stream=True), as used by stapp.SwarmUI
+stream_client = RoutedSwarm(Swarm())
+
+# Partial articles are mirrored here as they are generated
+ARTICLE_STREAM_QUEUE = "ArticleWriter.stream"
+
 # Model constants
-QWEN7 = 2
-LLAMA7 = 0
-GPT = 10
-MODEL = LLAMA7
+MODEL = LLAMA3_2
 
 
 # Define function to wrap search_news for agent use
+@tool
 def agent_search_news(**kwargs) -> dict:
     """Wrapper for search_news to work with agent messaging"""
     results = search_news(**kwargs)
     return {"status": "success", "results": results}
 
 
+@tool
+def agent_search_news_many(queries: list, max_results: int = 5) -> dict:
+    """Search several angles on a topic at once, deduplicating overlaps"""
+    results = search_news_many(queries, max_results=max_results)
+    return {"status": "success", "results": results}
+
+
 # Define the worker agents with new RabbitMQ-aware configuration
 news_gatherer = Agent(
     name="NewsGatherer",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a News Researcher who:
     1. Takes a topic or query
     2. Uses the search_news function to gather relevant information
@@ -50,12 +67,12 @@ news_gatherer = Agent(
     4. Provides structured data for the article writer
     
     Always verify sources and collect multiple perspectives.""",
-    functions=[agent_search_news],
+    functions=[agent_search_news, agent_search_news_many],
 )
 
 article_writer = Agent(
     name="ArticleWriter",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a Professional Writer who:
     1. Takes researched information
     2. Creates engaging, well-structured articles
@@ -67,7 +84,7 @@ article_writer = Agent(
 
 publisher = Agent(
     name="Publisher",
-    model=model_list[MODEL],
+    model=MODEL,
     instructions="""You are a Content Publisher who:
     1. Takes the final article
     2. Formats it for WordPress
@@ -89,70 +106,125 @@ logger.info(f"Agent {publisher.name} registered")
 
 def process_agent_message(agent_name: str, message: AgentMessage) -> Optional[str]:
     """Process a message for a specific agent"""
+    started = time.monotonic()
+    emit("agent_status", agent=agent_name, status="busy")
     try:
         logger.info(f"Processing message for {agent_name}")
         logger.debug(f"Message content: {message.content[:200]}...")
 
         # Run the agent with the message
-        response = client.run(
-            agent_name=agent_name, content=message.content, metadata=message.metadata
-        )
+        with tracing.span(f"agent {agent_name}", agent=agent_name):
+            with instruments.timer("agent_run_seconds", agent=agent_name):
+                response = client.run(
+                    agent_name=agent_name,
+                    content=message.content,
+                    metadata=message.metadata,
+                )
 
         if response and response.last_message:
             logger.info(f"Got response from {agent_name}")
+            emit("agent_status", agent=agent_name, status="idle")
             return response.last_message.content
 
+        emit("agent_status", agent=agent_name, status="no response")
         return None
 
     except Exception as e:
         logger.error(f"Error processing message for {agent_name}: {e}")
+        emit("agent_status", agent=agent_name, status="error")
         return None
+    finally:
+        emit("latency", name=f"agent.{agent_name}", seconds=time.monotonic() - started)
 
 
-def handle_news_flow(query: str):
+def gather_news(query: str) -> Optional[str]:
+    emit("query", query=query)
+    return process_agent_message(
+        "NewsGatherer",
+        AgentMessage(content=query, sender="system", metadata={"type": "news_query"}),
+    )
+
+
+def write_article(research: str) -> Optional[str]:
+    return process_agent_message(
+        "ArticleWriter",
+        AgentMessage(
+            content=research,
+            sender="NewsGatherer",
+            metadata={"type": "article_content"},
+        ),
+    )
+
+
+def stream_article(research: str):
+    """Stream the article's tokens, mirroring them to ARTICLE_STREAM_QUEUE"""
+    return publish_chunks(
+        ARTICLE_STREAM_QUEUE,
+        stream_agent(
+            stream_client, article_writer, [{"role": "user", "content": research}]
+        ),
+    )
+
+
+def publish_article(article) -> Optional[str]:
+    if isinstance(article, ChunkStream):
+        # Publisher needs the whole article; readers of the stream queue
+        # have been seeing it since the first tokens
+        article = article.text()
+    result = process_agent_message(
+        "Publisher",
+        AgentMessage(
+            content=article,
+            sender="ArticleWriter",
+            metadata={"type": "publish_content"},
+        ),
+    )
+    if result is not None:
+        emit("article", length=len(article))
+    return result
+
+
+def build_news_pipeline(streaming: bool = False) -> Pipeline:
+    """
+    Each stage has its own workers and a bounded inbox, so several queries
+    are in flight at once and a slow stage applies backpressure upstream.
+    With streaming, the article is handed to the Publisher stage (and
+    ARTICLE_STREAM_QUEUE) token by token while it is being written.
+    """
+    writer = (
+        Stage("ArticleWriter", stream_article, workers=2, maxsize=4, streaming=True)
+        if streaming
+        else Stage("ArticleWriter", write_article, workers=2, maxsize=4)
+    )
+    return Pipeline(
+        [
+            Stage("NewsGatherer", gather_news, workers=4, maxsize=8),
+            writer,
+            Stage("Publisher", publish_article, workers=2, maxsize=4),
+        ]
+    )
+
+
+news_pipeline = build_news_pipeline()
+streaming_news_pipeline = build_news_pipeline(streaming=True)
+
+
+def handle_news_flow(query: str, streaming: bool = False):
     """Handle the complete news article generation flow"""
+    pipeline = streaming_news_pipeline if streaming else news_pipeline
     try:
-        # Step 1: News Gathering
-        gather_response = process_agent_message(
-            "NewsGatherer",
-            AgentMessage(
-                content=query, sender="system", metadata={"type": "news_query"}
-            ),
-        )
-
-        if not gather_response:
-            raise Exception("Failed to gather news")
-
-        # Step 2: Article Writing
-        write_response = process_agent_message(
-            "ArticleWriter",
-            AgentMessage(
-                content=gather_response,
-                sender="NewsGatherer",
-                metadata={"type": "article_content"},
-            ),
-        )
-
-        if not write_response:
-            raise Exception("Failed to write article")
-
-        # Step 3: Publishing
-        publish_response = process_agent_message(
-            "Publisher",
-            AgentMessage(
-                content=write_response,
-                sender="ArticleWriter",
-                metadata={"type": "publish_content"},
-            ),
-        )
-
-        return publish_response
-
+        with tracing.span("news_flow", query=query, streaming=streaming):
+            return pipeline.submit(query).result()
     except Exception as e:
         logger.error(f"Error in news flow: {e}")
         return None
 
 
+def handle_news_flows(queries: List[str]) -> List[Optional[str]]:
+    """Run many news flows through the pipeline concurrently"""
+    return news_pipeline.map(queries)
+
+
 if __name__ == "__main__":
     print("\nStarting News Agents System...")
     print("Waiting for tasks. Press Ctrl+C to exit.\n")
@@ -179,4 +251,6 @@ if __name__ == "__main__":
 
     except KeyboardInterrupt:
         print("\nShutting down news agents...")
+        news_pipeline.close()
+        streaming_news_pipeline.close()
         client.close()
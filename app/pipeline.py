@@ -0,0 +1,196 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Optional
+
+import tracing
+from streaming import ChunkStream
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class StageError(RuntimeError):
+    """A stage failed or produced no output for a job"""
+
+
+class _Job:
+    __slots__ = ("value", "future", "trace", "enqueued")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+        # Stage spans are children of the submitter's span
+        self.trace = tracing.current()
+        self.enqueued = time.monotonic()
+
+
+class Stage:
+    """
+    One step of a Pipeline: a function run by its own pool of worker threads
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        maxsize: int = 4,
+        streaming: bool = False,
+    ):
+        """
+        Initialize the stage
+
+        Args:
+            name: Stage name used in logs and errors
+            func: Maps the previous stage's output to this stage's output;
+                returning None fails the job
+            workers: Jobs this stage processes concurrently
+            maxsize: Jobs allowed to wait for this stage before upstream
+                blocks (backpressure)
+            streaming: func returns an iterator of text chunks; the next
+                stage receives a ChunkStream as soon as the stage starts
+                instead of waiting for it to finish
+        """
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.streaming = streaming
+        self.inbox: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.next: Optional["Stage"] = None
+        self._threads: List[threading.Thread] = []
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"{self.name}-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job = self.inbox.get()
+            if job is _STOP:
+                return
+            waited = time.monotonic() - job.enqueued
+            with tracing.span(
+                f"stage {self.name}",
+                parent=job.trace,
+                stage=self.name,
+                queue_wait=waited,
+            ) as active:
+                if self.streaming:
+                    self._stream(job)
+                    continue
+                try:
+                    result = self.func(job.value)
+                    if result is None:
+                        raise StageError(f"Stage {self.name} produced no output")
+                except Exception as e:
+                    logger.error(f"Stage {self.name} failed: {e}")
+                    tracing.record_error(active, e)
+                    job.future.set_exception(e)
+                    continue
+            self._forward(job, result)
+
+    def _forward(self, job: _Job, result: Any) -> None:
+        if self.next is None:
+            job.future.set_result(result)
+        else:
+            job.value = result
+            job.enqueued = time.monotonic()
+            # Blocks while the next stage is saturated
+            self.next.inbox.put(job)
+
+    def _stream(self, job: _Job) -> None:
+        try:
+            chunks = iter(self.func(job.value))
+        except Exception as e:
+            logger.error(f"Stage {self.name} failed: {e}")
+            job.future.set_exception(e)
+            return
+        stream = ChunkStream()
+        self._forward(job, stream)
+        try:
+            for chunk in chunks:
+                stream.put(chunk)
+        except Exception as e:
+            logger.error(f"Stage {self.name} failed mid-stream: {e}")
+            stream.fail(e)
+        else:
+            stream.close()
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self.inbox.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+
+class Pipeline:
+    """
+    Chain of stages with bounded queues between them
+
+    Each stage works on different jobs at the same time, so job N+1 can be
+    in the first stage while job N is in the second, and a full queue
+    blocks submit() instead of growing without bound. When the last stage
+    streams, its Future resolves to a ChunkStream as soon as output starts.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        for stage, following in zip(stages, stages[1:]):
+            stage.next = following
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> "Pipeline":
+        # submit() starts the pipeline, possibly from several threads at once
+        with self._lock:
+            if not self._started:
+                for stage in self.stages:
+                    stage.start()
+                self._started = True
+        return self
+
+    def submit(self, value: Any, timeout: Optional[float] = None) -> Future:
+        """
+        Enqueue a job, blocking while the first stage is full
+
+        Returns:
+            Future for the last stage's output
+        """
+        self.start()
+        job = _Job(value)
+        self.stages[0].inbox.put(job, timeout=timeout)
+        return job.future
+
+    def map(self, values: Iterable[Any]) -> List[Any]:
+        """Run every value through the pipeline; failures become None"""
+        futures = [self.submit(value) for value in values]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                results.append(None)
+        return results
+
+    def close(self) -> None:
+        """Finish queued jobs stage by stage, then stop the workers"""
+        with self._lock:
+            for stage in self.stages:
+                stage.stop()
+            self._started = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,3 +1,25 @@
+import re
+from functools import lru_cache
+from string import Formatter
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+__all__ = [
+    "PROGRAM_PYTHON_PROMPT",
+    "PROJECT_MANAGER_PROMPT",
+    "TESTER_PROMPT",
+    "SYSTEM_EXECUTOR_PROMPT",
+    "PromptTemplate",
+    "count_tokens",
+    "PROGRAMMER",
+    "TESTER",
+    "EXECUTOR",
+]
+
 PROGRAM_PYTHON_PROMPT = f"""You are an expert software developer in a swarm of AI agents.
 Your role is to convert Product Manager (PM) instructions into working code.
 
@@ -66,3 +88,102 @@ When you receive code:
 
 Use Python's built-in file operations and subprocess to handle these tasks.
 Always maintain proper file structure and ensure clean test execution."""
+
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding("cl100k_base") if tiktoken is not None else None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count of text: exact cl100k_base count when tiktoken is
+    installed, otherwise a words-and-punctuation estimate that is close
+    for llama-family tokenizers
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    words = _WORD.findall(text)
+    # Long words split into several tokens
+    return sum(1 + len(word) // 6 for word in words)
+
+
+class PromptTemplate:
+    """
+    A prompt split into a large static system prefix and a small variable
+    part
+
+    The static text always comes first and is byte-identical between calls,
+    so the inference server's prefix/KV cache can reuse it; variable parts
+    go after it (or into the user message) and never change the prefix.
+    """
+
+    def __init__(
+        self, name: str, static: str, variable: str = "", user: str = "{input}"
+    ):
+        """
+        Compile the template
+
+        Args:
+            name: Template name used for lookup
+            static: Fixed system prompt text
+            variable: Format string appended to the system prompt
+            user: Format string for the user message
+        """
+        self.name = name
+        self.static = static
+        self.variable = variable
+        self.user = user
+        self.variable_fields = self._fields(variable)
+        self.user_fields = self._fields(user)
+        # Computed once; only the variable part is counted per call
+        self.static_tokens = count_tokens(static)
+        self._static_message = {"role": "system", "content": static}
+        # Per instance, so templates never share entries
+        self._assemble = lru_cache(maxsize=256)(self._format_system)
+
+    @staticmethod
+    def _fields(template: str) -> Tuple[str, ...]:
+        return tuple(field for _, field, _, _ in Formatter().parse(template) if field)
+
+    def system_message(self, **values) -> Dict[str, str]:
+        """The system message, cached per distinct set of variable values"""
+        if not self.variable_fields:
+            return dict(self._static_message)
+        return dict(self._assemble(tuple(sorted(values.items()))))
+
+    def _format_system(self, items: Tuple[Tuple[str, str], ...]) -> Dict[str, str]:
+        values = dict(items)
+        return {
+            "role": "system",
+            "content": self.static + self.variable.format(**values),
+        }
+
+    def messages(self, **values) -> List[Dict[str, str]]:
+        """System message followed by the user message"""
+        system_values = {k: values[k] for k in self.variable_fields}
+        user_values = {k: values[k] for k in self.user_fields}
+        return [
+            self.system_message(**system_values),
+            {"role": "user", "content": self.user.format(**user_values)},
+        ]
+
+    def render(self, **values) -> str:
+        """Whole prompt as one string, static prefix first"""
+        return "\n".join(message["content"] for message in self.messages(**values))
+
+    def count_tokens(self, **values) -> int:
+        """Prompt tokens, re-counting only the variable parts"""
+        variable = self.variable.format(**{k: values[k] for k in self.variable_fields})
+        user = self.user.format(**{k: values[k] for k in self.user_fields})
+        return self.static_tokens + count_tokens(variable) + count_tokens(user)
+
+
+# Compiled once at import; agents use system_message() as their instructions
+PROGRAMMER = PromptTemplate("programmer", PROGRAM_PYTHON_PROMPT, user="{instruction}")
+TESTER = PromptTemplate("tester", TESTER_PROMPT, user="{code}")
+EXECUTOR = PromptTemplate("executor", SYSTEM_EXECUTOR_PROMPT, user="{code}")
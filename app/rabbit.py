@@ -1,9 +1,21 @@
+import atexit
+import copy
 import logging
-from functools import wraps
-from typing import Any, Callable, Dict, Optional
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial, wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import pika
 
+import tracing
+from instrument import PUBLISHED_AT_HEADER, instruments
+from transport import Transport, for_queue
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,6 +38,87 @@ def connection_error_handler(func):
     return wrapper
 
 
+def _emit(kind: str, **fields) -> None:
+    # metrics builds on this module, so it is imported on first use
+    from metrics import emit
+
+    emit(kind, **fields)
+
+
+def stamped(properties: Optional[pika.BasicProperties] = None):
+    """
+    Copy of properties carrying the publish time and the current trace
+    context, so consumers can time the queue wait and continue the trace
+    """
+    headers = {}
+    if instruments.enabled:
+        headers[PUBLISHED_AT_HEADER] = time.time()
+    tracing.inject(headers)
+    if not headers:
+        return properties
+    properties = copy.copy(properties) if properties else pika.BasicProperties()
+    properties.headers = {**(properties.headers or {}), **headers}
+    return properties
+
+
+def _observe_queue_wait(queue_name: str, properties) -> Optional[float]:
+    headers = getattr(properties, "headers", None)
+    if not headers or PUBLISHED_AT_HEADER not in headers:
+        return None
+    waited = max(0.0, time.time() - float(headers[PUBLISHED_AT_HEADER]))
+    instruments.observe("rabbit_queue_wait_seconds", waited, queue=queue_name)
+    return waited
+
+
+def _consume_span(queue_name: str, properties) -> Optional[tracing.Span]:
+    """Span for handling one delivery, continuing the publisher's trace"""
+    waited = _observe_queue_wait(queue_name, properties)
+    return tracing.start_span(
+        f"consume {queue_name}",
+        parent=tracing.extract(getattr(properties, "headers", None)),
+        queue=queue_name,
+        queue_wait=waited,
+    )
+
+
+def _timed(callback: Callable, body) -> Tuple[Any, float]:
+    # Module level so process pools can pickle it
+    started = time.perf_counter()
+    result = callback(body)
+    return result, time.perf_counter() - started
+
+
+def connection_parameters(
+    host: str = "localhost",
+    port: int = 5672,
+    virtual_host: str = "/",
+    username: str = "guest",
+    password: str = "guest",
+    connection_attempts: int = 3,
+    retry_delay: int = 5,
+) -> pika.ConnectionParameters:
+    """
+    Build pika connection parameters
+
+    Args:
+        host: RabbitMQ server hostname
+        port: RabbitMQ server port
+        virtual_host: Virtual host to connect to
+        username: Authentication username
+        password: Authentication password
+        connection_attempts: Number of retry attempts
+        retry_delay: Delay between retries in seconds
+    """
+    return pika.ConnectionParameters(
+        host=host,
+        port=port,
+        virtual_host=virtual_host,
+        credentials=pika.PlainCredentials(username, password),
+        connection_attempts=connection_attempts,
+        retry_delay=retry_delay,
+    )
+
+
 class RabbitMQ:
     """
     RabbitMQ wrapper class for handling connections and basic operations
@@ -40,6 +133,8 @@ class RabbitMQ:
         password: str = "guest",
         connection_attempts: int = 3,
         retry_delay: int = 5,
+        connect_factory: Optional[Callable] = None,
+        transport: Optional[Transport] = None,
     ):
         """
         Initialize RabbitMQ connection parameters
@@ -52,16 +147,22 @@ class RabbitMQ:
             password: Authentication password
             connection_attempts: Number of retry attempts
             retry_delay: Delay between retries in seconds
+            connect_factory: Opens a connection from parameters, defaults to
+                the transport's (e.g. BlockingMemoryBroker.connect)
+            transport: Carrier of the messages, see transport.for_queue
         """
-        self.credentials = pika.PlainCredentials(username, password)
-        self.parameters = pika.ConnectionParameters(
+        self.transport = transport or for_queue()
+        self.connect_factory = connect_factory or self.transport.connect
+        self.parameters = connection_parameters(
             host=host,
             port=port,
             virtual_host=virtual_host,
-            credentials=self.credentials,
+            username=username,
+            password=password,
             connection_attempts=connection_attempts,
             retry_delay=retry_delay,
         )
+        self.credentials = self.parameters.credentials
         self.connection = None
         self.channel = None
         # self.connect()
@@ -70,7 +171,8 @@ class RabbitMQ:
     def connect(self) -> None:
         """Establish connection to RabbitMQ server"""
         if not self.connection or self.connection.is_closed:
-            self.connection = pika.BlockingConnection(self.parameters)
+            with instruments.timer("rabbit_connect_seconds", host=self.parameters.host):
+                self.connection = self.connect_factory(self.parameters)
             self.channel = self.connection.channel()
             logger.info("Successfully connected to RabbitMQ")
 
@@ -86,6 +188,9 @@ class RabbitConsumer(RabbitMQ):
     RabbitMQ Consumer class for message consumption
     """
 
+    # Report every handled delivery to the metrics exchange
+    emit_metrics = True
+
     def __init__(self, queue_name: str, **kwargs):
         """
         Initialize consumer with queue name and optional connection parameters
@@ -94,6 +199,7 @@ class RabbitConsumer(RabbitMQ):
             queue_name: Name of the queue to consume from
             **kwargs: Additional connection parameters
         """
+        kwargs["transport"] = kwargs.get("transport") or for_queue(queue_name)
         super().__init__(**kwargs)
         self.queue_name = queue_name
 
@@ -105,25 +211,54 @@ class RabbitConsumer(RabbitMQ):
         Args:
             durable: Whether the queue should survive broker restarts
         """
-        self.channel.queue_declare(queue=self.queue_name, durable=durable)
+        with instruments.timer("rabbit_declare_seconds", queue=self.queue_name):
+            self.channel.queue_declare(queue=self.queue_name, durable=durable)
 
-    def consume(self, callback: Callable) -> None:
+    def consume(
+        self,
+        callback: Callable,
+        workers: Optional[int] = None,
+        executor: str = "thread",
+        prefetch_count: Optional[int] = None,
+    ) -> None:
         """
         Start consuming messages from the queue
 
+        Without workers the callback runs on pika's I/O thread, one message
+        at a time. With workers, deliveries are dispatched to a thread or
+        process pool and acks are marshalled back to the connection thread,
+        so slow callbacks neither serialize the queue nor starve heartbeats.
+
         Args:
             callback: Callback function to process received messages
+            workers: Size of the worker pool, None to run callbacks inline
+            executor: "thread" or "process"; process pools need a picklable
+                module-level callback
+            prefetch_count: Unacked deliveries allowed, defaults to workers
         """
+        if workers:
+            return self._consume_pooled(callback, workers, executor, prefetch_count)
 
         def wrapped_callback(ch, method, properties, body):
+            span = _consume_span(self.queue_name, properties)
+            started = time.monotonic()
+            error = None
             try:
-                callback(body)
+                with tracing.activate(span):
+                    result, seconds = _timed(callback, body)
+                instruments.observe(
+                    "rabbit_callback_seconds", seconds, queue=self.queue_name
+                )
+                self._handle_result(properties, result)
                 ch.basic_ack(delivery_tag=method.delivery_tag)
             except Exception as e:
                 logger.error(f"Error processing message: {e}")
                 ch.basic_nack(delivery_tag=method.delivery_tag)
+                error = e
+            tracing.end_span(span, error)
+            self._record(started, ok=error is None)
 
-        self.channel.basic_qos(prefetch_count=1)
+        self.channel.basic_qos(prefetch_count=prefetch_count or 1)
         self.channel.basic_consume(
             queue=self.queue_name, on_message_callback=wrapped_callback
         )
@@ -131,6 +266,106 @@ class RabbitConsumer(RabbitMQ):
         logger.info(f"Started consuming from queue: {self.queue_name}")
         self.channel.start_consuming()
 
+    def _handle_result(self, properties: pika.BasicProperties, result: Any) -> None:
+        """Hook run on the connection thread before a successful ack"""
+
+    def _record(self, started: float, ok: bool) -> None:
+        if self.emit_metrics:
+            _emit(
+                "consumed",
+                name=f"consume.{self.queue_name}",
+                queue=self.queue_name,
+                seconds=time.monotonic() - started,
+                ok=ok,
+            )
+
+    def _settle(
+        self, delivery_tag: int, properties, started: float, span, future
+    ) -> None:
+        """Ack or nack a finished delivery; runs on the connection thread"""
+        self._in_flight.discard(delivery_tag)
+        error = future.exception()
+        tracing.end_span(span, error)
+        if not self.channel.is_open:
+            logger.warning(f"Channel closed before settling {delivery_tag}")
+            return
+        if error is None:
+            result, seconds = future.result()
+            instruments.observe(
+                "rabbit_callback_seconds", seconds, queue=self.queue_name
+            )
+            self._handle_result(properties, result)
+            self.channel.basic_ack(delivery_tag=delivery_tag)
+        else:
+            logger.error(f"Error processing message: {error}")
+            self.channel.basic_nack(delivery_tag=delivery_tag)
+        self._record(started, ok=error is None)
+
+    def _consume_pooled(
+        self,
+        callback: Callable,
+        workers: int,
+        executor: str,
+        prefetch_count: Optional[int],
+    ) -> None:
+        pool_class = {"thread": ThreadPoolExecutor, "process": ProcessPoolExecutor}
+        if executor not in pool_class:
+            raise ValueError(f"Unknown executor type: {executor}")
+        pool: Executor = pool_class[executor](max_workers=workers)
+        self._in_flight = set()
+
+        def on_done(delivery_tag, properties, started, span, future):
+            self.connection.add_callback_threadsafe(
+                partial(self._settle, delivery_tag, properties, started, span, future)
+            )
+
+        def dispatch(ch, method, properties, body):
+            span = _consume_span(self.queue_name, properties)
+            self._in_flight.add(method.delivery_tag)
+            if executor == "thread":
+                future = pool.submit(tracing.run_in_span, span, _timed, callback, body)
+            else:
+                # Spans do not cross into worker processes
+                future = pool.submit(_timed, callback, body)
+            future.add_done_callback(
+                partial(
+                    on_done, method.delivery_tag, properties, time.monotonic(), span
+                )
+            )
+
+        self.channel.basic_qos(prefetch_count=prefetch_count or workers)
+        self.channel.basic_consume(queue=self.queue_name, on_message_callback=dispatch)
+
+        logger.info(
+            f"Started consuming from queue: {self.queue_name} "
+            f"with {workers} {executor} workers"
+        )
+        try:
+            self.channel.start_consuming()
+        finally:
+            self._drain(pool)
+
+    def _drain(self, pool: Executor) -> None:
+        """Let in-flight deliveries finish and settle before returning"""
+        logger.info(f"Draining {len(self._in_flight)} in-flight messages")
+        try:
+            # Cancel the consumer; undelivered prefetched messages are requeued
+            self.channel.stop_consuming()
+        except pika.exceptions.AMQPError as e:
+            logger.warning(f"Could not cancel consumer: {e}")
+        pool.shutdown(wait=False)
+        while self._in_flight and self.connection.is_open:
+            try:
+                self.connection.process_data_events(time_limit=0.1)
+            except KeyboardInterrupt:
+                logger.warning("Drain interrupted, unacked messages will be requeued")
+                break
+        pool.shutdown(wait=True)
+
+    def stop(self) -> None:
+        """Stop consuming; safe to call from any thread"""
+        self.connection.add_callback_threadsafe(self.channel.stop_consuming)
+
     def __enter__(self):
         """Context manager enter"""
         print("Entering context manager")
@@ -156,6 +391,7 @@ class RabbitPublisher(RabbitMQ):
             queue_name: Name of the queue to publish to
             **kwargs: Additional connection parameters
         """
+        kwargs["transport"] = kwargs.get("transport") or for_queue(queue_name)
         super().__init__(**kwargs)
         self.queue_name = queue_name
         self.connect()
@@ -169,7 +405,8 @@ class RabbitPublisher(RabbitMQ):
         Args:
             durable: Whether the queue should survive broker restarts
         """
-        self.channel.queue_declare(queue=self.queue_name, durable=durable)
+        with instruments.timer("rabbit_declare_seconds", queue=self.queue_name):
+            self.channel.queue_declare(queue=self.queue_name, durable=durable)
 
     def publish(self, message: str) -> None:
         """
@@ -178,17 +415,471 @@ class RabbitPublisher(RabbitMQ):
         Args:
             message: Message to publish
         """
-        self.channel.basic_publish(
-            exchange="", routing_key=self.queue_name, body=message
+        with tracing.span(f"publish {self.queue_name}", queue=self.queue_name):
+            with instruments.timer("rabbit_publish_seconds", queue=self.queue_name):
+                self.channel.basic_publish(
+                    exchange="",
+                    routing_key=self.queue_name,
+                    body=self.transport.encode(message),
+                    properties=stamped(),
+                )
+        logger.debug(f"Published message to queue: {self.queue_name}")
+        _emit("published", queue=self.queue_name)
+
+    def batch(self, **kwargs) -> "PublishBatch":
+        """
+        Open a confirmed publishing batch on this publisher's connection
+
+        Args:
+            **kwargs: PublishBatch options (batch_size, linger, window, timeout)
+        """
+        return PublishBatch(self.connection, self.queue_name, **kwargs)
+
+    def publish_many(self, messages, **kwargs) -> List["PublishOutcome"]:
+        """
+        Publish messages with publisher confirms
+
+        Args:
+            messages: Iterable of message bodies
+            **kwargs: PublishBatch options (batch_size, linger, window, timeout)
+
+        Returns:
+            One PublishOutcome per message, in input order
+        """
+        with self.batch(**kwargs) as batch:
+            for message in messages:
+                batch.add(self.transport.encode(message))
+        return batch.results
+
+
+@dataclass
+class PublishOutcome:
+    """Broker confirmation result for one message of a PublishBatch"""
+
+    index: int
+    acked: bool = False
+    error: Optional[str] = None
+
+
+class PublishBatch:
+    """
+    Confirmed, pipelined publishing on a dedicated channel
+
+    Messages are buffered and written in groups of batch_size (or once the
+    oldest buffered message has waited linger seconds). Up to window
+    messages may be awaiting a broker ack at once, so a batch costs a
+    handful of round trips rather than one per message.
+    """
+
+    def __init__(
+        self,
+        connection: pika.BlockingConnection,
+        queue_name: str,
+        batch_size: int = 100,
+        linger: float = 0.05,
+        window: int = 1000,
+        timeout: float = 30.0,
+    ):
+        """
+        Initialize the batch
+
+        Args:
+            connection: Open connection to publish over
+            queue_name: Name of the queue to publish to
+            batch_size: Messages buffered before they are written
+            linger: Seconds a buffered message may wait before a write
+            window: Maximum unconfirmed messages in flight
+            timeout: Seconds to wait for outstanding confirms on flush
+        """
+        self.connection = connection
+        self.queue_name = queue_name
+        self.batch_size = batch_size
+        self.linger = linger
+        self.window = window
+        self.timeout = timeout
+        self.results: List[PublishOutcome] = []
+        self.channel = None
+        self._buffer: List[Tuple[int, Any, Any]] = []
+        self._buffered_at = 0.0
+        self._outstanding: "OrderedDict[int, int]" = OrderedDict()
+        self._next_tag = 1
+
+    @connection_error_handler
+    def open(self) -> None:
+        """Open the channel and put it in confirm mode"""
+        self.channel = self.connection.channel()
+        selected = []
+        self.channel._impl.confirm_delivery(
+            ack_nack_callback=self._on_confirm, callback=selected.append
+        )
+        deadline = time.monotonic() + self.timeout
+        while not selected:
+            if time.monotonic() > deadline:
+                raise TimeoutError("Broker did not enable confirm mode")
+            self.connection.process_data_events(time_limit=0.1)
+
+    def _on_confirm(self, frame) -> None:
+        method = frame.method
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        if method.multiple:
+            tags = [t for t in self._outstanding if t <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+        for tag in tags:
+            index = self._outstanding.pop(tag, None)
+            if index is None:
+                continue
+            outcome = self.results[index]
+            outcome.acked = acked
+            if not acked:
+                outcome.error = "nacked by broker"
+
+    def add(self, message, properties: Optional[pika.BasicProperties] = None) -> int:
+        """
+        Queue a message for publishing
+
+        Args:
+            message: Message body
+            properties: Optional message properties
+
+        Returns:
+            Index of the message's PublishOutcome in results
+        """
+        index = len(self.results)
+        self.results.append(PublishOutcome(index=index))
+        if not self._buffer:
+            self._buffered_at = time.monotonic()
+        self._buffer.append((index, message, properties))
+        if (
+            len(self._buffer) >= self.batch_size
+            or time.monotonic() - self._buffered_at >= self.linger
+        ):
+            self._write()
+        return index
+
+    @connection_error_handler
+    def _write(self) -> None:
+        for index, message, properties in self._buffer:
+            while len(self._outstanding) >= self.window:
+                self.connection.process_data_events(time_limit=0.1)
+            self.channel._impl.basic_publish(
+                exchange="",
+                routing_key=self.queue_name,
+                body=message,
+                properties=stamped(properties),
+            )
+            self._outstanding[self._next_tag] = index
+            self._next_tag += 1
+        self._buffer.clear()
+        # Flush the socket and pick up any confirms that already arrived
+        self.connection.process_data_events(time_limit=0)
+
+    def flush(self) -> None:
+        """Write buffered messages and wait for all outstanding confirms"""
+        if self._buffer:
+            self._write()
+        deadline = time.monotonic() + self.timeout
+        while self._outstanding and time.monotonic() < deadline:
+            self.connection.process_data_events(time_limit=0.1)
+        for index in self._outstanding.values():
+            self.results[index].error = "confirm timed out"
+        self._outstanding.clear()
+
+    def close(self) -> None:
+        """Flush and close the batch channel"""
+        try:
+            self.flush()
+        finally:
+            if self.channel and self.channel.is_open:
+                self.channel.close()
+        failed = sum(1 for outcome in self.results if not outcome.acked)
+        logger.debug(
+            f"Published {len(self.results)} messages to {self.queue_name}, "
+            f"{failed} unconfirmed"
         )
-        logger.info(f"Published message to queue: {self.queue_name}")
 
+    def __enter__(self):
+        self.open()
+        return self
 
-def publish(queue, message):
-    q = RabbitPublisher(queue)
-    q.publish(message)
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
-def consume(queue, callback):
+class PooledChannel:
+    """
+    An open connection/channel pair owned by a ChannelPool
+    """
+
+    def __init__(
+        self,
+        connection: pika.BlockingConnection,
+        transport: Optional[Transport] = None,
+    ):
+        self.connection = connection
+        self.transport = transport or for_queue()
+        self.channel = connection.channel()
+        self.declared = set()
+        self.last_used = time.monotonic()
+
+    @property
+    def is_open(self) -> bool:
+        return self.connection.is_open and self.channel.is_open
+
+    @connection_error_handler
+    def declare_queue(self, queue_name: str, durable: bool = True) -> None:
+        """
+        Declare a queue once per channel
+
+        Args:
+            queue_name: Name of the queue to declare
+            durable: Whether the queue should survive broker restarts
+        """
+        if queue_name not in self.declared:
+            with instruments.timer("rabbit_declare_seconds", queue=queue_name):
+                self.channel.queue_declare(queue=queue_name, durable=durable)
+            self.declared.add(queue_name)
+
+    def publish(self, queue_name: str, message, **kwargs) -> None:
+        """
+        Declare the queue if needed and publish a message to it
+
+        Args:
+            queue_name: Name of the queue to publish to
+            message: Message body
+            **kwargs: Additional basic_publish arguments
+        """
+        self.declare_queue(queue_name)
+        with tracing.span(f"publish {queue_name}", queue=queue_name):
+            kwargs["properties"] = stamped(kwargs.get("properties"))
+            with instruments.timer("rabbit_publish_seconds", queue=queue_name):
+                self.channel.basic_publish(
+                    exchange="",
+                    routing_key=queue_name,
+                    body=self.transport.encode(message),
+                    **kwargs,
+                )
+
+    def close(self) -> None:
+        try:
+            if self.connection.is_open:
+                self.connection.close()
+        except pika.exceptions.AMQPError as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+
+
+class ChannelPool:
+    """
+    Thread-safe pool of RabbitMQ channels keyed by transport and connection
+    parameters
+
+    pika's BlockingConnection is not thread-safe, so each pooled entry is a
+    dedicated connection/channel pair handed to one thread at a time.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 8,
+        max_idle: float = 30.0,
+        acquire_timeout: float = 30.0,
+        connect_factory: Optional[Callable] = None,
+    ):
+        """
+        Initialize an empty pool
+
+        Args:
+            max_size: Maximum open connections per set of connection parameters
+            max_idle: Seconds after which an idle entry is health-checked
+                before reuse
+            acquire_timeout: Seconds to wait for a free entry when the pool is
+                exhausted
+            connect_factory: Opens a connection from parameters, defaults to
+                the transport's
+        """
+        self.connect_factory = connect_factory
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self._idle: Dict[Tuple, List[PooledChannel]] = defaultdict(list)
+        self._size: Dict[Tuple, int] = defaultdict(int)
+        self._cond = threading.Condition()
+        self._closed = False
+
+    @staticmethod
+    def _key(parameters: pika.ConnectionParameters, transport: Transport) -> Tuple:
+        # The password is part of the key: a connection authenticated with
+        # old credentials must not be handed out for new ones
+        return (
+            transport,
+            parameters.host,
+            parameters.port,
+            parameters.virtual_host,
+            parameters.credentials.username,
+            parameters.credentials.password,
+        )
+
+    def _healthy(self, entry: PooledChannel) -> bool:
+        """Check an idle entry; called without the pool lock held"""
+        if not entry.is_open:
+            return False
+        if time.monotonic() - entry.last_used > self.max_idle:
+            try:
+                # Services heartbeats and surfaces a dead socket
+                entry.connection.process_data_events(time_limit=0)
+            except pika.exceptions.AMQPError:
+                return False
+        return entry.is_open
+
+    def _acquire(
+        self, parameters: pika.ConnectionParameters, transport: Transport
+    ) -> PooledChannel:
+        key = self._key(parameters, transport)
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            entry = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Channel pool is closed")
+                    if self._idle[key]:
+                        # Still counted in _size; this thread owns it now
+                        entry = self._idle[key].pop()
+                        break
+                    if self._size[key] < self.max_size:
+                        self._size[key] += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._cond.wait(remaining):
+                        raise TimeoutError(
+                            f"No free RabbitMQ channel after {self.acquire_timeout}s"
+                        )
+            if entry is None:
+                break
+            # A stalled socket must not block other threads on the pool lock
+            if self._healthy(entry):
+                return entry
+            entry.close()
+            with self._cond:
+                self._size[key] -= 1
+                self._cond.notify()
+        try:
+            with instruments.timer("rabbit_connect_seconds", host=parameters.host):
+                connect = self.connect_factory or transport.connect
+                entry = PooledChannel(connect(parameters), transport)
+        except Exception:
+            with self._cond:
+                self._size[key] -= 1
+                self._cond.notify()
+            raise
+        logger.info(f"Opened pooled RabbitMQ connection to {parameters.host}")
+        return entry
+
+    def _release(
+        self,
+        parameters: pika.ConnectionParameters,
+        transport: Transport,
+        entry: PooledChannel,
+    ):
+        key = self._key(parameters, transport)
+        with self._cond:
+            if entry.is_open and not self._closed:
+                entry.last_used = time.monotonic()
+                self._idle[key].append(entry)
+            else:
+                entry.close()
+                self._size[key] -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def channel(
+        self,
+        parameters: pika.ConnectionParameters,
+        transport: Optional[Transport] = None,
+    ) -> Iterator[PooledChannel]:
+        """
+        Borrow a channel for the duration of a with block
+
+        Args:
+            parameters: Connection parameters identifying the broker
+            transport: Carrier to connect through, defaults to for_queue()
+        """
+        transport = transport or for_queue()
+        entry = self._acquire(parameters, transport)
+        try:
+            yield entry
+        except pika.exceptions.AMQPError:
+            entry.close()
+            raise
+        finally:
+            self._release(parameters, transport, entry)
+
+    def close(self) -> None:
+        """Close every idle connection and refuse further acquisitions"""
+        with self._cond:
+            self._closed = True
+            for key, idle in self._idle.items():
+                for entry in idle:
+                    entry.close()
+                    self._size[key] -= 1
+                idle.clear()
+            self._cond.notify_all()
+
+
+_pool: Optional[ChannelPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ChannelPool:
+    """Return the process-wide channel pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ChannelPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def publish(queue, message, **kwargs):
+    """
+    Publish a message over a pooled channel
+
+    Args:
+        queue: Name of the queue to publish to
+        message: Message body
+        **kwargs: Connection parameters, see connection_parameters
+    """
+    transport = for_queue(queue)
+    with get_pool().channel(connection_parameters(**kwargs), transport) as pooled:
+        pooled.publish(queue, message)
+    logger.debug(f"Published message to queue: {queue}")
+    _emit("published", queue=queue)
+
+
+def publish_many(queue, messages, batch_size=100, linger=0.05, **kwargs):
+    """
+    Publish messages with publisher confirms over a pooled connection
+
+    Args:
+        queue: Name of the queue to publish to
+        messages: Iterable of message bodies
+        batch_size: Messages buffered before they are written
+        linger: Seconds a buffered message may wait before a write
+        **kwargs: Connection parameters, see connection_parameters
+
+    Returns:
+        One PublishOutcome per message, in input order
+    """
+    transport = for_queue(queue)
+    with get_pool().channel(connection_parameters(**kwargs), transport) as pooled:
+        pooled.declare_queue(queue)
+        with PublishBatch(
+            pooled.connection, queue, batch_size=batch_size, linger=linger
+        ) as batch:
+            for message in messages:
+                batch.add(transport.encode(message))
+    return batch.results
+
+
+def consume(queue, callback, workers=None, executor="thread"):
     with RabbitConsumer(queue) as q:
-        q.consume(callback)
+        q.consume(callback, workers=workers, executor=executor)
@@ -0,0 +1,270 @@
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from swarm import Agent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AgentDefinition:
+    """
+    Everything needed to build an Agent, with functions referenced by name
+    """
+
+    name: str
+    model: str
+    instructions: str
+    functions: Tuple[str, ...] = field(default_factory=tuple)
+
+    @property
+    def version(self) -> str:
+        """Content hash of the definition"""
+        canonical = json.dumps(asdict(self), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+    @property
+    def ref(self) -> str:
+        """The agent_name@version reference carried in messages"""
+        return f"{self.name}@{self.version}"
+
+
+def function_key(func: Callable) -> str:
+    """Registry name of a function: module.qualname, unique per process"""
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def _cells(func: Callable) -> Optional[Tuple]:
+    try:
+        return tuple(cell.cell_contents for cell in func.__closure__ or ())
+    except ValueError:
+        # An empty cell: nothing to compare, treat as different
+        return None
+
+
+def _same_value(a, b, seen: Set[Tuple[int, int]]) -> bool:
+    if callable(a) and callable(b):
+        return _same_function(a, b, seen)
+    return a == b
+
+
+def _same_function(
+    a: Callable, b: Callable, seen: Optional[Set[Tuple[int, int]]] = None
+) -> bool:
+    """Same object, or a redefinition with identical code, closure and defaults"""
+    if a is b:
+        return True
+    # A recursive closure refers to itself; assume equal while comparing it
+    seen = set() if seen is None else seen
+    if (id(a), id(b)) in seen:
+        return True
+    seen.add((id(a), id(b)))
+    code = getattr(a, "__code__", None)
+    if code is None or code != getattr(b, "__code__", None):
+        return False
+    cells, other_cells = _cells(a), _cells(b)
+    return (
+        cells is not None
+        and other_cells is not None
+        # Wrappers (e.g. instrument.tool) close over the function they wrap
+        and all(_same_value(x, y, seen) for x, y in zip(cells, other_cells))
+        and a.__defaults__ == b.__defaults__
+        and a.__kwdefaults__ == b.__kwdefaults__
+    )
+
+
+def split_ref(ref: str) -> Tuple[str, Optional[str]]:
+    """Split "name@version" into its parts; version is None if absent"""
+    name, _, version = ref.partition("@")
+    return name, version or None
+
+
+class AgentRegistry:
+    """
+    Name -> AgentDefinition mapping shared by senders and receivers
+
+    Messages carry only agent_name@version; receivers resolve the reference
+    here and reuse the Agent built on first resolution.
+    """
+
+    def __init__(self):
+        self._definitions: Dict[str, Dict[str, AgentDefinition]] = {}
+        self._latest: Dict[str, str] = {}
+        self._functions: Dict[str, Callable] = {}
+        self._short_names: Dict[str, Set[str]] = {}
+        self._built: Dict[str, Agent] = {}
+        self._lock = threading.Lock()
+
+    def register_function(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Make a tool function resolvable by name; usable as a decorator
+
+        Re-registering the same function, or a redefinition with identical
+        code, closure and defaults (a re-run script), replaces the entry; a
+        different function under a taken name raises ValueError. Closures
+        made by one factory share a key, so register them with a name.
+
+        Args:
+            func: The function agents may call
+            name: Registered name, defaults to function_key(func)
+        """
+        key = name or function_key(func)
+        with self._lock:
+            existing = self._functions.get(key)
+            if existing is not None and not _same_function(existing, func):
+                raise ValueError(
+                    f"Function {key} is already registered to {existing!r}"
+                )
+            self._functions[key] = func
+            self._short_names.setdefault(func.__name__, set()).add(key)
+        return func
+
+    def function(self, name: str) -> Callable:
+        """
+        Look up a registered function by key, or by bare name (as stored
+        before keys were qualified) if exactly one function has that name
+        """
+        with self._lock:
+            func = self._functions.get(name)
+            if func is not None:
+                return func
+            keys = self._short_names.get(name, set())
+            if len(keys) == 1:
+                return self._functions[next(iter(keys))]
+        if keys:
+            raise KeyError(f"Function {name} is ambiguous: {', '.join(sorted(keys))}")
+        raise KeyError(f"Function {name} is not registered")
+
+    def register(self, definition: AgentDefinition) -> str:
+        """
+        Add a definition; the newest registration of a name becomes latest
+
+        Args:
+            definition: Agent definition to register
+
+        Returns:
+            The definition's agent_name@version reference
+        """
+        with self._lock:
+            versions = self._definitions.setdefault(definition.name, {})
+            if definition.version not in versions:
+                versions[definition.version] = definition
+                logger.debug(f"Registered agent {definition.ref}")
+            self._latest[definition.name] = definition.version
+        return definition.ref
+
+    def register_agent(self, agent: Agent) -> str:
+        """
+        Register an existing Agent, registering its functions by key
+
+        Args:
+            agent: Agent with string instructions
+
+        Returns:
+            The agent's agent_name@version reference
+        """
+        if not isinstance(agent.instructions, str):
+            raise TypeError(f"Agent {agent.name} must have string instructions")
+        for func in agent.functions:
+            self.register_function(func)
+        definition = AgentDefinition(
+            name=agent.name,
+            model=agent.model,
+            instructions=agent.instructions,
+            functions=tuple(function_key(func) for func in agent.functions),
+        )
+        ref = self.register(definition)
+        with self._lock:
+            self._built.setdefault(ref, agent)
+        return ref
+
+    def definition(self, ref: str) -> AgentDefinition:
+        """
+        Find the definition for "name@version" or "name" (latest)
+
+        Args:
+            ref: Agent reference
+        """
+        name, version = split_ref(ref)
+        with self._lock:
+            versions = self._definitions.get(name)
+            if not versions:
+                raise KeyError(f"Agent {name} is not registered")
+            version = version or self._latest[name]
+            if version not in versions:
+                raise KeyError(f"Agent {name} has no version {version}")
+            return versions[version]
+
+    def resolve(self, ref: str) -> Agent:
+        """
+        Build (once) and return the Agent for a reference
+
+        Args:
+            ref: Agent reference, "name@version" or "name"
+        """
+        definition = self.definition(ref)
+        with self._lock:
+            agent = self._built.get(definition.ref)
+        if agent is not None:
+            return agent
+        agent = Agent(
+            name=definition.name,
+            model=definition.model,
+            instructions=definition.instructions,
+            functions=[self.function(name) for name in definition.functions],
+        )
+        with self._lock:
+            return self._built.setdefault(definition.ref, agent)
+
+    def ref(self, name: str) -> str:
+        """Reference to the latest registered version of an agent"""
+        return self.definition(name).ref
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return list(self._definitions)
+
+    def load(self, path: str) -> List[str]:
+        """
+        Register every definition in a JSON file
+
+        The file holds a list of {"name", "model", "instructions",
+        "functions"} objects; functions must already be registered by the
+        time the agents are resolved.
+
+        Args:
+            path: Path of the definitions file
+
+        Returns:
+            References of the loaded definitions
+        """
+        with open(path, "r") as f:
+            data = json.load(f)
+        return [
+            self.register(
+                AgentDefinition(
+                    name=item["name"],
+                    model=item["model"],
+                    instructions=item["instructions"],
+                    functions=tuple(item.get("functions", ())),
+                )
+            )
+            for item in data
+        ]
+
+    def dump(self, path: str) -> None:
+        """Write the latest version of every agent to a JSON file"""
+        with self._lock:
+            data = [
+                asdict(self._definitions[name][version])
+                for name, version in self._latest.items()
+            ]
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+
+registry = AgentRegistry()
@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from swarm import Swarm
+from swarm.types import Response
+
+import tracing
+from instrument import instruments
+from models import ModelSpec, model_specs
+
+logger = logging.getLogger(__name__)
+
+
+class _Slots:
+    """Concurrency limit for one model, with visible queue depth"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.fallbacks = 0
+
+
+class ModelRouter:
+    """
+    Per-model concurrency limits with overflow queueing and fallback
+
+    Requests beyond a model's max_concurrency wait in line. When the line
+    for a model is fallback_depth deep and its fallback model has a free
+    slot, the request runs on the fallback instead.
+    """
+
+    def __init__(
+        self,
+        specs: Optional[Dict[str, ModelSpec]] = None,
+        fallback_depth: int = 2,
+    ):
+        """
+        Initialize the router
+
+        Args:
+            specs: Model name -> ModelSpec, defaults to models.model_specs
+            fallback_depth: Queue depth at which requests overflow to the
+                model's fallback
+        """
+        self.specs = specs if specs is not None else model_specs
+        self.fallback_depth = fallback_depth
+        self._slots = {
+            name: _Slots(spec.max_concurrency) for name, spec in self.specs.items()
+        }
+        self._cond = threading.Condition()
+
+    def _free(self, model: str) -> bool:
+        slots = self._slots[model]
+        return slots.in_flight < slots.limit
+
+    def _choose(self, model: str) -> str:
+        """Walk the fallback chain while the current model's queue is deep"""
+        chosen, seen = model, {model}
+        while self._slots[chosen].waiting >= self.fallback_depth:
+            fallback = self.specs[chosen].fallback
+            if fallback is None or fallback in seen or fallback not in self._slots:
+                break
+            if self._free(fallback):
+                return fallback
+            chosen = fallback
+            seen.add(fallback)
+        return model
+
+    @contextmanager
+    def acquire(self, model: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Hold a slot for the duration of a with block
+
+        Args:
+            model: Requested model
+            timeout: Seconds to wait in line before TimeoutError
+
+        Yields:
+            The model to actually call (the requested one or a fallback)
+        """
+        if model not in self._slots:
+            yield model
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            chosen = model if self._free(model) else self._choose(model)
+            if chosen == model and not self._free(model):
+                slots = self._slots[model]
+                slots.waiting += 1
+                try:
+                    while not self._free(model):
+                        remaining = (
+                            None if deadline is None else deadline - time.monotonic()
+                        )
+                        if remaining is not None and remaining <= 0:
+                            raise TimeoutError(f"No free slot for {model}")
+                        self._cond.wait(remaining)
+                finally:
+                    slots.waiting -= 1
+            slots = self._slots[chosen]
+            slots.in_flight += 1
+            slots.served += 1
+            if chosen != model:
+                self._slots[model].fallbacks += 1
+                logger.info(f"Routing {model} request to {chosen}")
+        try:
+            yield chosen
+        finally:
+            with self._cond:
+                slots.in_flight -= 1
+                self._cond.notify_all()
+
+    def select(self, min_context: int = 0, max_latency: Optional[float] = None) -> str:
+        """
+        Cheapest model with enough context and acceptable latency,
+        preferring ones with a free slot
+        """
+        candidates = [
+            spec
+            for spec in self.specs.values()
+            if spec.context >= min_context
+            and (max_latency is None or spec.latency <= max_latency)
+        ]
+        if not candidates:
+            raise ValueError("No model satisfies the requirements")
+        with self._cond:
+            return min(
+                candidates, key=lambda spec: (not self._free(spec.name), spec.cost)
+            ).name
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._cond:
+            return {
+                name: {
+                    "in_flight": slots.in_flight,
+                    "waiting": slots.waiting,
+                    "served": slots.served,
+                    "fallbacks": slots.fallbacks,
+                }
+                for name, slots in self._slots.items()
+            }
+
+
+router = ModelRouter()
+
+
+class RoutedResponse(Response):
+    """A Swarm Response naming the model that actually answered"""
+
+    model: Optional[str] = None
+
+
+class RoutedSwarm:
+    """
+    Drop-in wrapper around a Swarm client that runs every call through a
+    ModelRouter, passing fallbacks as model_override
+
+    Non-streaming runs return a RoutedResponse, so wrappers such as
+    CachedSwarm can tell a fallback's answer from the requested model's.
+
+    The slot is taken once per run, for the starting agent's model. If the
+    run hands off to an agent on another model, that agent's calls still
+    count against the starting model's slot, not its own, and a fallback
+    chosen as model_override applies to every agent of the run. Route
+    multi-model handoff chains as separate runs to keep limits exact.
+    """
+
+    def __init__(
+        self, client: Optional[Swarm] = None, model_router: ModelRouter = router
+    ):
+        self.client = client or Swarm()
+        self.router = model_router
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def run(self, agent=None, messages=None, **kwargs):
+        if agent is None or messages is None:
+            given = {"agent": agent, "messages": messages}
+            return self.client.run(
+                **{name: value for name, value in given.items() if value is not None},
+                **kwargs,
+            )
+        requested = kwargs.pop("model_override", None) or agent.model
+        if kwargs.pop("stream", False):
+            return self._stream(agent, messages, requested, **kwargs)
+        waiting = time.perf_counter()
+        with self.router.acquire(requested) as model:
+            instruments.observe(
+                "model_wait_seconds", time.perf_counter() - waiting, model=requested
+            )
+            with tracing.span(f"model {model}", model=model, agent=agent.name):
+                with instruments.timer(
+                    "model_call_seconds", model=model, agent=agent.name
+                ):
+                    response = self.client.run(
+                        agent=agent,
+                        messages=messages,
+                        model_override=model if model != agent.model else None,
+                        **kwargs,
+                    )
+        return RoutedResponse(
+            messages=response.messages,
+            agent=response.agent,
+            context_variables=response.context_variables,
+            model=model,
+        )
+
+    def _stream(self, agent, messages, requested, **kwargs):
+        # The slot is held until the caller finishes consuming the stream
+        waiting = time.perf_counter()
+        with self.router.acquire(requested) as model:
+            instruments.observe(
+                "model_wait_seconds", time.perf_counter() - waiting, model=requested
+            )
+            with tracing.span(f"model {model}", model=model, agent=agent.name):
+                with instruments.timer(
+                    "model_call_seconds", model=model, agent=agent.name
+                ):
+                    yield from self.client.run(
+                        agent=agent,
+                        messages=messages,
+                        model_override=model if model != agent.model else None,
+                        stream=True,
+                        **kwargs,
+                    )
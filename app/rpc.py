@@ -0,0 +1,310 @@
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+
+import pika
+
+import tracing
+from instrument import instruments
+from rabbit import RabbitConsumer, RabbitMQ, connection_error_handler, stamped
+from transport import for_queue, serve_locally
+
+logger = logging.getLogger(__name__)
+
+# RabbitMQ's direct reply-to pseudo queue: no queue declaration per client
+REPLY_TO = "amq.rabbitmq.reply-to"
+ERROR_HEADER = "x-rpc-error"
+
+
+class RpcError(RuntimeError):
+    """The remote handler raised; carries its error text"""
+
+
+def _guarded(handler: Callable, body: bytes) -> Tuple[Optional[bytes], Optional[str]]:
+    # Module level so process pools can pickle it
+    try:
+        return handler(body), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class RpcServer(RabbitConsumer):
+    """
+    Serves requests from a queue, replying to each caller's reply_to
+    """
+
+    def _handle_result(self, properties: pika.BasicProperties, result) -> None:
+        reply, error = result
+        if not properties.reply_to:
+            logger.warning("Dropping reply for request without reply_to")
+            return
+        headers = {ERROR_HEADER: error} if error is not None else None
+        if error is not None:
+            logger.error(f"RPC handler failed: {error}")
+        if isinstance(reply, str):
+            reply = reply.encode("utf-8")
+        body = b""
+        if reply is not None:
+            try:
+                body = self.transport.encode(reply)
+            except TypeError as e:
+                # Tell the caller instead of leaving it to time out
+                logger.error(f"RPC handler returned an unsendable reply: {e}")
+                headers = {ERROR_HEADER: str(e)}
+        self.channel.basic_publish(
+            exchange="",
+            routing_key=properties.reply_to,
+            body=body,
+            properties=pika.BasicProperties(
+                correlation_id=properties.correlation_id, headers=headers
+            ),
+        )
+
+    def serve(self, handler: Callable[[bytes], bytes], **kwargs) -> None:
+        """
+        Answer requests until stopped
+
+        Handler errors are sent back to the caller rather than requeued.
+
+        Args:
+            handler: Function mapping a request body to a reply body
+            **kwargs: RabbitConsumer.consume options (workers, executor, ...)
+        """
+        self.consume(partial(_guarded, handler), **kwargs)
+
+
+class RpcClient(RabbitMQ):
+    """
+    Request/reply client multiplexing many in-flight calls on one connection
+
+    A background thread owns the connection; calls from any other thread
+    are handed to it with add_callback_threadsafe and complete a Future
+    when the reply with the matching correlation id arrives. Do not call
+    call() from inside an RPC reply callback.
+
+    Calls to a queue on another transport than the client's (see
+    transport.for_queue) go through a child client on that transport,
+    unless a transport or connect_factory was given explicitly. Each
+    client connects on its first call, so a process that only calls
+    in-process queues never needs RabbitMQ.
+    """
+
+    def __init__(self, timeout: float = 30.0, **kwargs):
+        """
+        Initialize client with optional connection parameters
+
+        Args:
+            timeout: Default seconds to wait for a reply
+            **kwargs: Additional connection parameters
+        """
+        super().__init__(**kwargs)
+        self.timeout = timeout
+        self._kwargs = kwargs
+        self._pinned = bool(kwargs.get("transport") or kwargs.get("connect_factory"))
+        self._children: Dict[str, "RpcClient"] = {}
+        self._pending: Dict[str, Tuple[Future, float]] = {}
+        # _lock guards _pending and is taken by _on_reply on the I/O thread;
+        # connecting and creating children happen under _start_lock instead
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._started = False
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def start(self) -> "RpcClient":
+        """Accept calls; the connection is opened by the first one"""
+        self._started = True
+        return self
+
+    def _io_thread(self) -> threading.Thread:
+        """The I/O thread, connecting first if this is the first call"""
+        with self._start_lock:
+            if self._thread is None:
+                self._connect_io()
+            return self._thread
+
+    @connection_error_handler
+    def _connect_io(self) -> None:
+        """Connect, subscribe to direct reply-to and start the I/O thread"""
+        self.connect()
+        self.channel.basic_consume(
+            queue=REPLY_TO, on_message_callback=self._on_reply, auto_ack=True
+        )
+        self._stopping.clear()
+        thread = threading.Thread(target=self._run, name="rpc-client", daemon=True)
+        thread.start()
+        self._thread = thread
+
+    def _run(self) -> None:
+        try:
+            while not self._stopping.is_set():
+                self.connection.process_data_events(time_limit=0.1)
+                self._expire()
+        except pika.exceptions.AMQPError as e:
+            logger.error(f"RPC client connection lost: {e}")
+        finally:
+            self._fail_pending(ConnectionError("RPC client stopped"))
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                cid for cid, (_, deadline) in self._pending.items() if deadline < now
+            ]
+            futures = [self._pending.pop(cid)[0] for cid in expired]
+        for future in futures:
+            future.set_exception(TimeoutError("RPC call timed out"))
+
+    def _fail_pending(self, error: Exception) -> None:
+        with self._lock:
+            futures = [future for future, _ in self._pending.values()]
+            self._pending.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    def _on_reply(self, ch, method, properties, body) -> None:
+        with self._lock:
+            entry = self._pending.pop(properties.correlation_id, None)
+        if entry is None:
+            logger.debug(f"Late or unknown reply {properties.correlation_id}")
+            return
+        future = entry[0]
+        error = (properties.headers or {}).get(ERROR_HEADER)
+        if error is not None:
+            future.set_exception(RpcError(error))
+        else:
+            future.set_result(body)
+
+    def _publish(
+        self,
+        queue: str,
+        body: bytes,
+        correlation_id: str,
+        properties: pika.BasicProperties,
+    ) -> None:
+        try:
+            self.channel.basic_publish(
+                exchange="", routing_key=queue, body=body, properties=properties
+            )
+        except pika.exceptions.AMQPError as e:
+            with self._lock:
+                entry = self._pending.pop(correlation_id, None)
+            if entry is not None:
+                entry[0].set_exception(e)
+
+    def _client_for(self, queue: str) -> "RpcClient":
+        transport = for_queue(queue)
+        if self._pinned or transport is self.transport:
+            return self
+        with self._start_lock:
+            client = self._children.get(transport.name)
+            if client is None:
+                kwargs = {**self._kwargs, "transport": transport}
+                client = RpcClient(self.timeout, **kwargs).start()
+                self._children[transport.name] = client
+        return client
+
+    def call_async(self, queue: str, body, timeout: Optional[float] = None) -> Future:
+        """
+        Send a request and return a Future for its reply body
+
+        Args:
+            queue: Name of the queue the server consumes
+            body: Request body: str, bytes, or an object such as an
+                AgentEnvelope, encoded only if the transport needs bytes
+            timeout: Seconds before the Future fails with TimeoutError
+        """
+        if not self._started:
+            raise RuntimeError("RPC client is not started")
+        client = self._client_for(queue)
+        if client is not self:
+            return client.call_async(queue, body, timeout)
+        if not self._io_thread().is_alive():
+            raise RuntimeError("RPC client connection is closed")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        body = self.transport.encode(body)
+        correlation_id = uuid.uuid4().hex
+        future: Future = Future()
+        # Running futures cannot be cancelled, so set_result never races
+        future.set_running_or_notify_cancel()
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._lock:
+            self._pending[correlation_id] = (future, deadline)
+        if instruments.enabled:
+            started = time.perf_counter()
+            future.add_done_callback(
+                lambda _: instruments.observe(
+                    "rpc_call_seconds", time.perf_counter() - started, queue=queue
+                )
+            )
+        span = tracing.start_span(f"rpc {queue}", queue=queue)
+        if span is not None:
+            future.add_done_callback(lambda f: tracing.end_span(span, f.exception()))
+        # Headers are built here: the I/O thread does not see the caller's span
+        with tracing.activate(span):
+            properties = stamped(
+                pika.BasicProperties(reply_to=REPLY_TO, correlation_id=correlation_id)
+            )
+        self.connection.add_callback_threadsafe(
+            partial(self._publish, queue, body, correlation_id, properties)
+        )
+        return future
+
+    def call(self, queue: str, body, timeout: Optional[float] = None) -> bytes:
+        """
+        Send a request and block until its reply arrives
+
+        Args:
+            queue: Name of the queue the server consumes
+            body: Request body, see call_async
+            timeout: Seconds to wait for the reply
+        """
+        return self.call_async(queue, body, timeout).result()
+
+    async def acall(self, queue: str, body, timeout: Optional[float] = None) -> bytes:
+        """Awaitable variant of call for asyncio code"""
+        return await asyncio.wrap_future(self.call_async(queue, body, timeout))
+
+    def close(self) -> None:
+        """Stop the I/O thread, fail outstanding calls and disconnect"""
+        self._started = False
+        with self._start_lock:
+            children = list(self._children.values())
+            self._children.clear()
+            thread, self._thread = self._thread, None
+        for child in children:
+            child.close()
+        self._stopping.set()
+        if thread is not None:
+            thread.join()
+        super().close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def serve(queue, handler, workers=None, local=False):
+    """
+    Serve handler on queue until stopped
+
+    Args:
+        queue: Queue to consume, usually the agent's name
+        handler: Function mapping a request body to a reply body
+        workers: Requests handled in parallel
+        local: Serve in-process only: RpcClients in this process then hand
+            requests over by reference, and other processes cannot reach it
+    """
+    if local:
+        serve_locally(queue)
+    with RpcServer(queue) as server:
+        server.serve(handler, workers=workers)
@@ -1,16 +1,30 @@
 import streamlit as st
 from swarm import Swarm, Agent
-import json
 from typing import List, Dict, Optional
 from dataclasses import dataclass
+import math
 import os
 
+from agentindex import AgentIndex
+from agentstore import AgentRecord, AgentStore, function_names
+from llmcache import CachedSwarm
+from prompts import PROGRAMMER, TESTER
+from router import RoutedSwarm
+from streaming import ThrottledRenderer
+
+AGENTS_DB = "agents.db"
+LEGACY_AGENTS_FILE = "agents.json"
+CATEGORIES = ['general', 'specialized', 'custom']
+PAGE_SIZE = 20
+
 AGENT_TEMPLATES = {
     'general': "You are a helpful general assistant focused on providing clear, accurate information on any topic.",
     'coder': "You are an expert programmer who helps write, explain and debug code. You follow best practices and provide detailed explanations.",
     'analyst': "You are a data analyst focused on helping interpret data, create visualizations, and derive insights.",
     'teacher': "You are an expert teacher who explains complex topics in simple terms with examples and analogies.",
-    'writer': "You are a skilled writer who helps with content creation, editing and writing improvement."
+    'writer': "You are a skilled writer who helps with content creation, editing and writing improvement.",
+    'programmer': PROGRAMMER.system_message()["content"],
+    'tester': TESTER.system_message()["content"],
 }
 
 @dataclass
@@ -20,15 +34,22 @@ class AgentConfig:
     category: str
     functions: List = None
     
+@st.cache_resource
+def get_client():
+    # Default template agents answer repeated questions from the cache
+    template_agents = [f"{name.title()} Assistant" for name in AGENT_TEMPLATES]
+    return CachedSwarm(RoutedSwarm(Swarm()), agents=template_agents)
+
+@st.cache_resource
+def get_agent_store(path: str = AGENTS_DB) -> AgentStore:
+    return AgentStore(path)
+
 class SwarmUI:
-    def __init__(self):
-        self.client = Swarm()
-        self.agents = {
-            'general': {},
-            'specialized': {},
-            'custom': {}
-        }
-        self.setup_session_state()
+    def __init__(self, client=None, store: Optional[AgentStore] = None):
+        self.client = client or get_client()
+        self.store = store or get_agent_store()
+        # Shared by every session; the index does its own locking
+        self.index = AgentIndex()
         self.load_agents()
         
     def setup_session_state(self):
@@ -37,7 +58,7 @@ class SwarmUI:
         if 'current_agent' not in st.session_state:
             st.session_state.current_agent = None
             
-    def create_agent(self, name: str, instructions: str, category: str = 'custom', functions: List = None) -> Agent:
+    def create_agent(self, name: str, instructions: str, category: str = 'custom', functions: List = None, persist: bool = True) -> Agent:
         if functions is None:
             functions = []
         agent = Agent(
@@ -45,8 +66,9 @@ class SwarmUI:
             instructions=instructions,
             functions=functions
         )
-        self.agents[category][name] = agent
-        self.save_agents()
+        self.index.add(agent, category)
+        if persist:
+            self.store.upsert(AgentRecord(name, instructions, category, function_names(functions)))
         return agent
     
     def create_from_template(self, name: str, template: str, category: str = 'general'):
@@ -54,61 +76,54 @@ class SwarmUI:
         return self.create_agent(name, instructions, category)
         
     def list_agents(self, category: Optional[str] = None) -> List[str]:
-        if category:
-            return list(self.agents[category].keys())
-        return [name for category in self.agents.values() for name in category.keys()]
+        return self.index.names(category)
         
     def get_agent(self, name: str) -> Optional[Agent]:
-        for category in self.agents.values():
-            if name in category:
-                return category[name]
-        return None
+        return self.index.get(name)
+    
+    def search_agents(self, query: str, category: Optional[str] = None, limit: int = 50) -> List[str]:
+        return self.index.search(query, category, limit)
+    
+    def page_agents(self, category: str, page: int = 0, page_size: int = PAGE_SIZE) -> List:
+        return self.index.page(category, page, page_size)
         
     def remove_agent(self, name: str):
-        for category in self.agents:
-            if name in self.agents[category]:
-                del self.agents[category][name]
-                self.save_agents()
-                break
+        if self.index.remove(name) is not None:
+            self.store.delete(name)
                 
     def save_agents(self):
-        agents_data = {}
-        for category, agents in self.agents.items():
-            agents_data[category] = {
-                name: {
-                    'instructions': agent.instructions,
-                    'functions': agent.functions
-                } for name, agent in agents.items()
-            }
-        with open('agents.json', 'w') as f:
-            json.dump(agents_data, f)
+        self.store.upsert_many(
+            AgentRecord(name, agent.instructions, category, function_names(agent.functions))
+            for name, category, agent in self.index.entries()
+        )
             
     def load_agents(self):
-        try:
-            with open('agents.json', 'r') as f:
-                agents_data = json.load(f)
-                for category, agents in agents_data.items():
-                    for name, data in agents.items():
-                        self.create_agent(
-                            name, 
-                            data['instructions'],
-                            category,
-                            data.get('functions', [])
-                        )
-        except FileNotFoundError:
+        records = self.store.load()
+        if not records and os.path.exists(LEGACY_AGENTS_FILE):
+            records = self.store.import_json(LEGACY_AGENTS_FILE)
+        if not records:
             # Create default agents from templates
-            for template_name, instructions in AGENT_TEMPLATES.items():
-                self.create_agent(
-                    f"{template_name.title()} Assistant",
-                    instructions,
-                    'general'
-                )
+            records = [
+                AgentRecord(f"{template_name.title()} Assistant", instructions, 'general')
+                for template_name, instructions in AGENT_TEMPLATES.items()
+            ]
+            self.store.upsert_many(records)
+        for record in records:
+            self.create_agent(
+                record.name,
+                record.instructions,
+                record.category,
+                record.resolve_functions(),
+                persist=False
+            )
                 
     def process_message(self, user_input: str, agent: Agent, context_vars: Optional[Dict] = None):
         if not agent:
             st.error("Please select an agent first")
             return
             
+        # Only the current message: st.session_state.messages is display-only,
+        # so the prompt does not grow with the session
         messages = [{"role": "user", "content": user_input}]
         
         with st.spinner("Processing..."):
@@ -119,8 +134,8 @@ class SwarmUI:
                 stream=True
             )
             
-            message_buffer = ""
             message_container = st.empty()
+            renderer = ThrottledRenderer(message_container.markdown)
             
             for chunk in response:
                 if "delim" in chunk:
@@ -128,9 +143,16 @@ class SwarmUI:
                         st.write(f"🔄 Agent {agent.name} is processing...")
                     continue
                     
-                if "content" in chunk:
-                    message_buffer += chunk["content"]
-                    message_container.markdown(message_buffer)
+                if chunk.get("content"):
+                    renderer.write(chunk["content"])
+                    
+            message_buffer = renderer.close()
+            stats = renderer.stats()
+            if stats["ttft"] is not None:
+                st.caption(
+                    f"First token after {stats['ttft']:.2f}s · "
+                    f"{stats['tokens_per_sec'] or 0:.1f} tokens/s"
+                )
                     
             st.session_state.messages.append({
                 "role": "user",
@@ -144,6 +166,11 @@ class SwarmUI:
                 "agent": agent.name
             })
 
+@st.cache_resource
+def get_swarm_ui() -> SwarmUI:
+    """One SwarmUI per process; agent changes update it in place"""
+    return SwarmUI()
+
 def render_sidebar(swarm: SwarmUI):
     st.sidebar.title("Agent Management")
     
@@ -173,35 +200,57 @@ def render_sidebar(swarm: SwarmUI):
             st.sidebar.success(f"Custom agent {custom_name} created!")
             st.rerun()
             
+def render_agent_row(swarm: SwarmUI, agent_name: str, agent: Agent, key: str):
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        st.write(f"**{agent_name}**")
+        with st.expander("Instructions"):
+            st.write(agent.instructions)
+    with col2:
+        if st.button("Select", key=f"select_{key}_{agent_name}"):
+            st.session_state.current_agent = agent
+    with col3:
+        if st.button("Delete", key=f"delete_{key}_{agent_name}"):
+            swarm.remove_agent(agent_name)
+            if st.session_state.current_agent and st.session_state.current_agent.name == agent_name:
+                st.session_state.current_agent = None
+            st.rerun()
+
 def render_chat():
     st.title("OpenAI Swarm Agent Chat")
     
-    swarm = SwarmUI()
+    swarm = get_swarm_ui()
+    swarm.setup_session_state()
     render_sidebar(swarm)
     
     # Agent listing and selection
     st.subheader("Available Agents")
     
-    tabs = st.tabs(["General", "Specialized", "Custom"])
+    query = st.text_input("Search agents", placeholder="Name or words from the instructions")
     
-    for tab, category in zip(tabs, swarm.agents.keys()):
-        with tab:
-            for agent_name in swarm.list_agents(category):
-                col1, col2, col3 = st.columns([3, 1, 1])
-                with col1:
-                    st.write(f"**{agent_name}**")
-                    agent = swarm.get_agent(agent_name)
-                    with st.expander("Instructions"):
-                        st.write(agent.instructions)
-                with col2:
-                    if st.button("Select", key=f"select_{agent_name}"):
-                        st.session_state.current_agent = agent
-                with col3:
-                    if st.button("Delete", key=f"delete_{agent_name}"):
-                        swarm.remove_agent(agent_name)
-                        if st.session_state.current_agent and st.session_state.current_agent.name == agent_name:
-                            st.session_state.current_agent = None
-                        st.rerun()
+    if query:
+        results = swarm.search_agents(query)
+        if not results:
+            st.info("No matching agents")
+        for agent_name in results:
+            agent = swarm.get_agent(agent_name)
+            if agent is not None:
+                render_agent_row(swarm, agent_name, agent, key="search")
+    else:
+        tabs = st.tabs([category.title() for category in CATEGORIES])
+        
+        for tab, category in zip(tabs, CATEGORIES):
+            with tab:
+                total = swarm.index.count(category)
+                pages = max(1, math.ceil(total / PAGE_SIZE))
+                page = 0
+                if pages > 1:
+                    page = st.number_input(
+                        f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                        key=f"page_{category}"
+                    ) - 1
+                for agent_name, agent in swarm.page_agents(category, page):
+                    render_agent_row(swarm, agent_name, agent, key=category)
     
     # Chat interface
     st.subheader("Chat")
@@ -0,0 +1,284 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from rabbit import publish
+
+logger = logging.getLogger(__name__)
+
+
+class ChunkStream:
+    """
+    Thread-safe, replayable stream of text chunks
+
+    A producer thread put()s chunks and close()s the stream; any number of
+    readers iterate over it while it is still being written, or call
+    text() to wait for the whole thing.
+    """
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+
+    def put(self, chunk: str) -> None:
+        with self._cond:
+            self._chunks.append(chunk)
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._done = True
+            self._cond.notify_all()
+
+    def fail(self, error: BaseException) -> None:
+        with self._cond:
+            self._error = error
+            self._done = True
+            self._cond.notify_all()
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def __iter__(self) -> Iterator[str]:
+        index = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: index < len(self._chunks) or self._done)
+                chunks = self._chunks[index:]
+                finished = self._done
+                error = self._error
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+            if finished and index >= len(self._chunks):
+                if error is not None:
+                    raise error
+                return
+
+    def text(self, timeout: Optional[float] = None) -> str:
+        """Block until the stream is closed and return everything written"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._done, timeout):
+                raise TimeoutError("Stream did not finish in time")
+            if self._error is not None:
+                raise self._error
+            return "".join(self._chunks)
+
+    def __str__(self) -> str:
+        return self.text()
+
+
+def stream_agent(client, agent, messages, context_variables=None) -> Iterator[str]:
+    """
+    Yield content chunks from a Swarm client's stream=True run
+    """
+    response = client.run(
+        agent=agent,
+        messages=messages,
+        context_variables=context_variables or {},
+        stream=True,
+    )
+    for chunk in response:
+        if chunk.get("content"):
+            yield chunk["content"]
+
+
+def publish_chunks(
+    queue: str,
+    chunks: Iterable[str],
+    stream_id: Optional[str] = None,
+    min_chars: int = 64,
+    max_delay: float = 0.1,
+    send: Callable = publish,
+) -> Iterator[str]:
+    """
+    Pass chunks through while publishing them to a queue
+
+    Tokens are coalesced into messages of at least min_chars, or whatever
+    arrived within max_delay, so the queue is not flooded one token at a
+    time. The last message carries final=True. Mirroring is best effort:
+    if a publish fails, the error is logged and the rest of the stream is
+    passed through without publishing, so callers still get every chunk.
+
+    Args:
+        queue: Queue receiving the stream messages
+        chunks: Source of text chunks
+        stream_id: Identifier shared by every message of the stream
+        min_chars: Characters to accumulate before publishing
+        max_delay: Seconds after which pending characters are published
+        send: publish(queue, body) function, rabbit.publish by default
+    """
+    stream_id = stream_id or uuid.uuid4().hex
+    seq = 0
+    pending: List[str] = []
+    size = 0
+    last_sent = time.monotonic()
+    mirroring = True
+
+    def flush(final: bool) -> None:
+        nonlocal seq, size, last_sent, mirroring
+        body = {"id": stream_id, "seq": seq, "data": "".join(pending), "final": final}
+        if mirroring:
+            try:
+                send(queue, json.dumps(body))
+            except Exception as e:
+                # A broken mirror must not cost the caller the generated text
+                logger.error(f"Stopped mirroring stream {stream_id} to {queue}: {e}")
+                mirroring = False
+        seq += 1
+        pending.clear()
+        size = 0
+        last_sent = time.monotonic()
+
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= min_chars or time.monotonic() - last_sent >= max_delay:
+            flush(final=False)
+        yield chunk
+    flush(final=True)
+
+
+class ThrottledRenderer:
+    """
+    Accumulates streamed chunks and redraws a view at a bounded rate
+
+    Chunks are collected in a list and handed to render (with the full text
+    so far) only when min_interval has passed or min_chars arrived since
+    the last draw, so a long answer costs a few dozen redraws instead of
+    one per token. Also measures time to first token and tokens/sec, where
+    a token is one streamed chunk.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[str], None],
+        min_interval: float = 0.1,
+        min_chars: int = 512,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize the renderer
+
+        Args:
+            render: render(text) draws the text so far
+            min_interval: Seconds between redraws
+            min_chars: Pending characters that force a redraw sooner
+            clock: Time source
+        """
+        self.render = render
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.clock = clock
+        self.tokens = 0
+        self.flushes = 0
+        self._text = ""
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self._started = clock()
+        self._first: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._last_flush = self._started
+
+    def write(self, chunk: str) -> None:
+        if not chunk:
+            return
+        now = self.clock()
+        if self._first is None:
+            self._first = now
+        self.tokens += 1
+        self._pending.append(chunk)
+        self._pending_chars += len(chunk)
+        if (
+            self._pending_chars >= self.min_chars
+            or now - self._last_flush >= self.min_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        self._text += "".join(self._pending)
+        self._pending.clear()
+        self._pending_chars = 0
+        self.render(self._text)
+        self.flushes += 1
+        self._last_flush = self.clock()
+
+    def close(self) -> str:
+        """Draw whatever is pending and return the full text"""
+        self.flush()
+        self._finished = self.clock()
+        return self._text
+
+    @property
+    def text(self) -> str:
+        return self._text + "".join(self._pending)
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        end = self._finished if self._finished is not None else self.clock()
+        ttft = None if self._first is None else self._first - self._started
+        generating = None if self._first is None else end - self._first
+        return {
+            "ttft": ttft,
+            "tokens": self.tokens,
+            "tokens_per_sec": (self.tokens / generating if generating else None),
+            "flushes": self.flushes,
+        }
+
+
+class StreamAssembler:
+    """
+    Rebuilds ChunkStreams from messages produced by publish_chunks
+
+    Use feed as a consumer callback; on_stream is called with
+    (stream_id, ChunkStream) when the first message of a stream arrives,
+    so readers can start on partial content.
+    """
+
+    def __init__(self, on_stream: Optional[Callable[[str, ChunkStream], None]] = None):
+        self.on_stream = on_stream
+        self.streams: Dict[str, ChunkStream] = {}
+        self._next_seq: Dict[str, int] = {}
+        self._early: Dict[str, Dict[int, dict]] = {}
+        self._lock = threading.Lock()
+
+    def feed(self, body: bytes) -> None:
+        message = json.loads(body)
+        stream_id = message["id"]
+        with self._lock:
+            created = stream_id not in self.streams
+            if created:
+                self.streams[stream_id] = ChunkStream()
+                self._next_seq[stream_id] = 0
+                self._early[stream_id] = {}
+            stream = self.streams[stream_id]
+            if stream.done:
+                logger.debug(f"Ignoring redelivered chunk for finished {stream_id}")
+                return
+            # Messages may be redelivered out of order; release them in sequence
+            early = self._early[stream_id]
+            early[message["seq"]] = message
+            while self._next_seq[stream_id] in early:
+                item = early.pop(self._next_seq[stream_id])
+                self._next_seq[stream_id] += 1
+                if item["data"]:
+                    stream.put(item["data"])
+                if item["final"]:
+                    stream.close()
+                    del self._next_seq[stream_id]
+                    del self._early[stream_id]
+                    break
+        if created and self.on_stream is not None:
+            self.on_stream(stream_id, stream)
+
+    def pop(self, stream_id: str) -> Optional[ChunkStream]:
+        """Forget a finished stream and return it"""
+        with self._lock:
+            return self.streams.pop(stream_id, None)
@@ -0,0 +1,198 @@
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header: 00-<trace id>-<parent span id>-<flags>
+TRACEPARENT_HEADER = "traceparent"
+
+
+@dataclass
+class Span:
+    """One timed operation of a trace; times are epoch seconds"""
+
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    end: Optional[float] = None
+    status: str = "ok"
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """Identity of a span, e.g. a remote parent read from message headers"""
+
+    trace_id: str
+    span_id: str
+
+
+class JsonlExporter:
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", buffering=1)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps({**asdict(span), "duration": span.duration}, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+_exporter = None
+
+
+def configure(exporter=None, path: Optional[str] = None) -> None:
+    """
+    Enable tracing with an exporter (anything with export(span)), or a
+    JsonlExporter writing to path; configure() with neither disables it
+    """
+    global _exporter
+    _exporter = exporter or (JsonlExporter(path) if path else None)
+
+
+def enabled() -> bool:
+    return _exporter is not None
+
+
+def current() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, parent=None, **attributes) -> Optional[Span]:
+    """
+    Create a span without making it current; None while tracing is off
+
+    Args:
+        name: Operation name
+        parent: Parent Span or SpanContext, defaults to the current span
+        **attributes: Extra data recorded with the span
+    """
+    if _exporter is None:
+        return None
+    parent = parent or _current.get()
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent else None,
+        attributes=attributes,
+    )
+
+
+def record_error(span: Optional[Span], error: BaseException) -> None:
+    """Mark a span failed with an error that was handled, not raised"""
+    if span is not None:
+        span.status = "error"
+        span.error = f"{type(error).__name__}: {error}"
+
+
+def end_span(span: Optional[Span], error: Optional[BaseException] = None) -> None:
+    if span is None:
+        return
+    span.end = time.time()
+    if error is not None:
+        record_error(span, error)
+    try:
+        _exporter.export(span)
+    except Exception as e:
+        logger.warning(f"Could not export span {span.name}: {e}")
+
+
+@contextmanager
+def activate(span: Optional[Span]) -> Iterator[Optional[Span]]:
+    """Make span current for the duration of a with block"""
+    token = _current.set(span) if span is not None else None
+    try:
+        yield span
+    finally:
+        if token is not None:
+            _current.reset(token)
+
+
+@contextmanager
+def span(name: str, parent=None, **attributes) -> Iterator[Optional[Span]]:
+    """Run a with block as a span, a child of the current one by default"""
+    active = start_span(name, parent, **attributes)
+    error = None
+    try:
+        with activate(active):
+            yield active
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        end_span(active, error)
+
+
+def traced(name: str) -> Callable:
+    """Decorator running every call of a function as a span"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(headers: Dict, active: Optional[Span] = None) -> Dict:
+    """Add the current (or given) span's traceparent to message headers"""
+    active = active or _current.get()
+    if active is not None:
+        headers[TRACEPARENT_HEADER] = active.traceparent
+    return headers
+
+
+def extract(headers: Optional[Dict]) -> Optional[SpanContext]:
+    """Read the remote parent from message headers, if any"""
+    value = (headers or {}).get(TRACEPARENT_HEADER)
+    if isinstance(value, bytes):
+        value = value.decode("ascii", "replace")
+    try:
+        _, trace_id, span_id, _ = value.split("-")
+    except (AttributeError, ValueError):
+        return None
+    return SpanContext(trace_id, span_id)
+
+
+def run_in_span(active: Optional[Span], func: Callable, *args):
+    """Call func with active as the current span (for worker threads)"""
+    with activate(active):
+        return func(*args)
+
+
+if os.environ.get("SWARM_TRACE_FILE"):
+    configure(path=os.environ["SWARM_TRACE_FILE"])
@@ -0,0 +1,143 @@
+"""
+Transports carrying rabbit.py's queues
+
+    SWARM_TRANSPORT=local                          # every queue in-process
+    SWARM_LOCAL_QUEUES=Spanish_Agent,Publisher     # these in-process, the rest AMQP
+
+AmqpTransport goes through RabbitMQ and puts bytes on the wire. The local
+transport is one process-wide BlockingMemoryBroker with bounded queues:
+publishers and consumers in the same process exchange the Python objects
+themselves, so an AgentEnvelope handed to a co-located agent is never
+encoded, copied or sent over a socket. Both expose the pika
+BlockingConnection interface, so consumers, publishers, RPC and the
+channel pool run unchanged on either.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Optional, Set
+
+import pika
+
+from memblocking import BlockingMemoryBroker
+
+AMQP = "amqp"
+LOCAL = "local"
+
+
+class Transport(ABC):
+    """Opens connections and turns message bodies into what travels"""
+
+    name = ""
+
+    @abstractmethod
+    def connect(self, parameters: pika.ConnectionParameters):
+        """Open a BlockingConnection-compatible connection"""
+
+    def encode(self, body: Any) -> Any:
+        """Body as sent; objects that cannot travel as they are get encoded"""
+        return body
+
+
+class AmqpTransport(Transport):
+    """RabbitMQ through pika; bodies must be bytes"""
+
+    name = AMQP
+
+    def connect(self, parameters: pika.ConnectionParameters) -> pika.BlockingConnection:
+        return pika.BlockingConnection(parameters)
+
+    def encode(self, body: Any) -> Any:
+        if body is None or isinstance(body, (bytes, str)):
+            return body
+        # e.g. marsh.AgentEnvelope, which knows its wire format; bytes() would
+        # also accept ints and iterables and silently send the wrong thing
+        if hasattr(type(body), "__bytes__"):
+            return bytes(body)
+        raise TypeError(
+            f"Cannot send {type(body).__name__} over AMQP: "
+            "pass bytes, str or an object defining __bytes__"
+        )
+
+
+class LocalTransport(Transport):
+    """In-process queues passing bodies by reference"""
+
+    name = LOCAL
+
+    def __init__(
+        self, max_length: Optional[int] = 10000, publish_timeout: float = 30.0
+    ):
+        """
+        Initialize the transport with its own broker
+
+        Args:
+            max_length: Undelivered messages per queue before publishers
+                block, None for unbounded
+            publish_timeout: Seconds a publisher waits on a full queue
+        """
+        self.broker = BlockingMemoryBroker(max_length, publish_timeout)
+
+    def connect(self, parameters: Optional[pika.ConnectionParameters] = None):
+        return self.broker.connect(parameters)
+
+
+_amqp = AmqpTransport()
+_local: Optional[LocalTransport] = None
+_lock = threading.Lock()
+
+_default = os.environ.get("SWARM_TRANSPORT", AMQP)
+_local_queues: Set[str] = {
+    name.strip()
+    for name in os.environ.get("SWARM_LOCAL_QUEUES", "").split(",")
+    if name.strip()
+}
+
+
+def local() -> LocalTransport:
+    """The process-wide in-process transport, created on first use"""
+    global _local
+    with _lock:
+        if _local is None:
+            _local = LocalTransport()
+        return _local
+
+
+def get(name: str) -> Transport:
+    """Transport by name: "amqp" or "local" """
+    if name == AMQP:
+        return _amqp
+    if name == LOCAL:
+        return local()
+    raise ValueError(f"Unknown transport: {name}")
+
+
+def configure(
+    default: Optional[str] = None, local_queues: Optional[Iterable[str]] = None
+) -> None:
+    """
+    Choose transports in code instead of through the environment
+
+    Args:
+        default: Transport for queues not listed in local_queues
+        local_queues: Queues served in this process; replaces the current set
+    """
+    global _default, _local_queues
+    if default is not None:
+        get(default)
+        _default = default
+    if local_queues is not None:
+        _local_queues = set(local_queues)
+
+
+def serve_locally(*queue_names: str) -> None:
+    """Route these queues in-process, e.g. when registering a co-located agent"""
+    _local_queues.update(queue_names)
+
+
+def for_queue(queue_name: str = "") -> Transport:
+    """Transport carrying a queue: local if served in-process, else the default"""
+    if queue_name and queue_name in _local_queues:
+        return local()
+    return get(_default)
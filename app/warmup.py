@@ -0,0 +1,148 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import ollama
+
+from models import model_specs
+
+logger = logging.getLogger(__name__)
+
+KEEP_ALIVE = "10m"
+
+
+def ollama_load(model: str, keep_alive: str = KEEP_ALIVE) -> None:
+    """Load a model into memory without generating anything"""
+    spec = model_specs.get(model)
+    if spec is not None and spec.embedding:
+        ollama.embed(model=model, input="", keep_alive=keep_alive)
+    else:
+        # An empty prompt only loads the model
+        ollama.generate(model=model, prompt="", keep_alive=keep_alive)
+
+
+class WarmupManager:
+    """
+    Pre-loads the models a worker's agents use and keeps them resident
+
+    warm() loads every model in parallel and sets ready once all of them
+    answered; start() also pings them every interval seconds so they are
+    never evicted for idleness. The loader is injectable so tests can use
+    a local stand-in for the inference server.
+    """
+
+    def __init__(
+        self,
+        models: Iterable[str],
+        loader: Callable[[str, str], None] = ollama_load,
+        keep_alive: str = KEEP_ALIVE,
+        interval: float = 240.0,
+    ):
+        """
+        Initialize the manager
+
+        Args:
+            models: Model names to keep warm; remote (non-local) ones are skipped
+            loader: loader(model, keep_alive) loads a model
+            keep_alive: How long the server keeps a model after each ping
+            interval: Seconds between keep-alive pings, below keep_alive
+        """
+        self.models = [
+            model
+            for model in dict.fromkeys(models)
+            if model_specs.get(model) is None or model_specs[model].local
+        ]
+        self.loader = loader
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.ready = threading.Event()
+        self.failed: Dict[str, str] = {}
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_agents(
+        cls, agents: Iterable, include_fallbacks: bool = True, **kwargs
+    ) -> "WarmupManager":
+        """
+        Manager for the models used by the given agents
+
+        Args:
+            agents: Agents whose models are needed
+            include_fallbacks: Also warm the router's fallback chain, so an
+                overflow to a smaller model does not pay a cold start
+        """
+        models = []
+        for agent in agents:
+            model = agent.model
+            while model is not None and model not in models:
+                models.append(model)
+                spec = model_specs.get(model)
+                model = spec.fallback if spec and include_fallbacks else None
+        return cls(models, **kwargs)
+
+    def _load(self, model: str) -> Optional[str]:
+        try:
+            self.loader(model, self.keep_alive)
+        except Exception as e:
+            logger.error(f"Could not load model {model}: {e}")
+            return str(e)
+        return None
+
+    def warm(self) -> bool:
+        """
+        Load every model in parallel; sets ready if all of them loaded
+
+        Returns:
+            True if every model loaded
+        """
+        if not self.models:
+            self.ready.set()
+            return True
+        logger.info(f"Warming up models: {', '.join(self.models)}")
+        with ThreadPoolExecutor(max_workers=len(self.models)) as pool:
+            errors = dict(zip(self.models, pool.map(self._load, self.models)))
+        self.failed = {model: error for model, error in errors.items() if error}
+        if not self.failed:
+            self.ready.set()
+            logger.info("All models warm")
+        return not self.failed
+
+    def _keep_alive(self) -> None:
+        while not self._stopping.wait(self.interval):
+            for model in self.models:
+                if self._load(model) is None:
+                    self.failed.pop(model, None)
+            if not self.failed:
+                self.ready.set()
+
+    def start(self, timeout: Optional[float] = None) -> bool:
+        """
+        Warm up, then keep models resident in a background thread
+
+        Args:
+            timeout: Seconds to wait for the models, None to wait for all
+
+        Returns:
+            True once every model is warm, False if some failed or timed out
+        """
+        worker = threading.Thread(target=self.warm, name="warmup", daemon=True)
+        worker.start()
+        worker.join(timeout)
+        self._thread = threading.Thread(
+            target=self._keep_alive, name="keep-alive", daemon=True
+        )
+        self._thread.start()
+        return self.ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def models_loaded(self) -> List[str]:
+        return [model for model in self.models if model not in self.failed]